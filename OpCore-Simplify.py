@@ -1,17 +1,25 @@
+import staged_update
+import os
+import sys
+
+# An update staged by the previous session is moved into place before anything from Scripts is imported,
+# so the updated modules are the ones loaded. Only a changed launcher needs a restart
+if __name__ == '__main__' and "OpCore-Simplify.py" in staged_update.apply_staged_update(os.path.dirname(os.path.realpath(__file__))):
+    os.execv(sys.executable, ['python3'] + sys.argv)
+
 from Scripts.datasets import os_data
 from Scripts import acpi_guru
+from Scripts import cache_bundle
 from Scripts import compatibility_checker
 from Scripts import config_prodigy
 from Scripts import gathering_files
 from Scripts import kext_maestro
+from Scripts import materializer
 from Scripts import run
 from Scripts import smbios
 from Scripts import utils
 import updater
-import os
-import sys
 import re
-import shutil
 import traceback
 import time
 
@@ -26,7 +34,10 @@ class OCPE:
         self.s = smbios.SMBIOS()
         self.r = run.Run()
         self.u = utils.Utils()
+        self.updater = updater.Updater()
+        self.materializer = materializer.get_materializer()
         self.result_dir = os.path.join(os.path.dirname(os.path.realpath(__file__)), "Results")
+        self.efi_selective_paths = ("EFI/OC/Drivers", "EFI/OC/Tools", "EFI/OC/Resources/Audio", "EFI/OC/Resources/Image")
 
     def gathering_files(self, macos_version):
         self.u.head("Gathering Files")
@@ -34,7 +45,9 @@ class OCPE:
         print("Please wait for download OpenCorePkg, kexts and macserial...")
         print("")
 
-        self.o.get_bootloader_kexts_data(self.k.kexts)
+        self.o.wait_for_prefetch()
+        if not self.o.offline:
+            self.o.get_bootloader_kexts_data(self.k.kexts)
         self.o.gather_bootloader_kexts(self.k.kexts, macos_version)
 
     def select_hardware_report(self):
@@ -119,8 +132,8 @@ class OCPE:
             if match:
                 target_version = "{}.{}.{}".format(match.group(1), match.group(2) if match.group(2) else 99, match.group(3) if match.group(3) else 99)
                 
-                if  self.u.parse_darwin_version(native_macos_version[0]) <= self.u.parse_darwin_version(target_version) <= self.u.parse_darwin_version(native_macos_version[-1]) or \
-                    (ocl_patched_macos_version and self.u.parse_darwin_version(ocl_patched_macos_version[-1]) <= self.u.parse_darwin_version(target_version) <= self.u.parse_darwin_version(ocl_patched_macos_version[0])):
+                if  os_data.DarwinVersion(target_version).is_between(native_macos_version[0], native_macos_version[-1]) or \
+                    (ocl_patched_macos_version and os_data.DarwinVersion(target_version).is_between(ocl_patched_macos_version[-1], ocl_patched_macos_version[0])):
                     return target_version
 
     def build_opencore_efi(self, hardware_report, unsupported_devices, smbios_model, macos_version, needs_oclp):
@@ -133,7 +146,8 @@ class OCPE:
             raise Exception("Directory '{}' does not exist.".format(self.k.ock_files_dir))
         
         source_efi_dir = os.path.join(self.k.ock_files_dir, "OpenCorePkg")
-        shutil.copytree(source_efi_dir, self.result_dir, dirs_exist_ok=True)
+        # Drivers, tools and resources depend on the generated config.plist and are copied in step 5
+        self.materializer.copy_tree(source_efi_dir, self.result_dir, lambda relative_path, source_path: relative_path not in self.efi_selective_paths)
         print("Done")
         print("2. Generate config.plist...", end=" ")
         config_file = os.path.join(self.result_dir, "EFI", "OC", "config.plist")
@@ -151,6 +165,7 @@ class OCPE:
             self.ac.acpi_directory = os.path.join(self.result_dir, "EFI", "OC", "ACPI")
             self.ac.smbios_model = smbios_model
             self.ac.lpc_bus_device = self.ac.get_lpc_name()
+            self.ac.begin_ssdt_batch()
 
             for patch in self.ac.patches:
                 if patch.checked:
@@ -167,6 +182,11 @@ class OCPE:
                     config_data["ACPI"]["Add"].extend(acpi_load.get("Add", []))
                     config_data["ACPI"]["Delete"].extend(acpi_load.get("Delete", []))
                     config_data["ACPI"]["Patch"].extend(acpi_load.get("Patch", []))
+
+            compiled_ssdts = self.ac.compile_ssdts()
+            for acpi_add in config_data["ACPI"]["Add"]:
+                if acpi_add.get("Path") in compiled_ssdts:
+                    acpi_add["Enabled"] = compiled_ssdts[acpi_add.get("Path")]
         
         config_data["ACPI"]["Patch"].extend(self.ac.dsdt_patches)
         config_data["ACPI"]["Patch"] = self.ac.apply_acpi_patches(config_data["ACPI"]["Patch"])
@@ -178,55 +198,27 @@ class OCPE:
 
         self.u.write_file(config_file, config_data)
         print("Done")
-        print("5. Clean up unused drivers, resources, and tools...", end=" ")
-        files_to_remove = []
-
-        drivers_directory = os.path.join(self.result_dir, "EFI", "OC", "Drivers")
-        driver_list = self.u.find_matching_paths(drivers_directory, extension_filter=".efi")
-        driver_loaded = [kext.get("Path") for kext in config_data.get("UEFI").get("Drivers")]
-        for driver_path, type in driver_list:
-            if not driver_path in driver_loaded:
-                files_to_remove.append(os.path.join(drivers_directory, driver_path))
-
-        resources_audio_dir = os.path.join(self.result_dir, "EFI", "OC", "Resources", "Audio")
-        if os.path.exists(resources_audio_dir):
-            files_to_remove.append(resources_audio_dir)
+        print("5. Copy used drivers, resources, and tools...", end=" ")
+        driver_loaded = set(driver.get("Path") for driver in config_data.get("UEFI").get("Drivers"))
+        tool_loaded = set(tool.get("Path") for tool in config_data.get("Misc").get("Tools"))
 
         picker_variant = config_data.get("Misc", {}).get("Boot", {}).get("PickerVariant")
         if picker_variant in (None, "Auto"):
             picker_variant = "Acidanthera/GoldenGate" 
-        if os.name == "nt":
-            picker_variant = picker_variant.replace("/", "\\")
 
-        resources_image_dir = os.path.join(self.result_dir, "EFI", "OC", "Resources", "Image")
-        available_picker_variants = self.u.find_matching_paths(resources_image_dir, type_filter="dir")
+        def is_picker_variant_used(relative_path, source_path):
+            if os.path.isdir(source_path) and any(name.endswith(".icns") for name in os.listdir(source_path)):
+                return picker_variant in relative_path
+            return True
 
-        for variant_name, variant_type in available_picker_variants:
-            variant_path = os.path.join(resources_image_dir, variant_name)
-            if ".icns" in ", ".join(os.listdir(variant_path)):
-                if picker_variant not in variant_name:
-                    files_to_remove.append(variant_path)
-
-        tools_directory = os.path.join(self.result_dir, "EFI", "OC", "Tools")
-        tool_list = self.u.find_matching_paths(tools_directory, extension_filter=".efi")
-        tool_loaded = [tool.get("Path") for tool in config_data.get("Misc").get("Tools")]
-        for tool_path, type in tool_list:
-            if not tool_path in tool_loaded:
-                files_to_remove.append(os.path.join(tools_directory, tool_path))
-
-        removal_error = None
-        for file_path in files_to_remove:
-            try:
-                if os.path.isdir(file_path):
-                    shutil.rmtree(file_path)
-                else:
-                    os.remove(file_path)
-            except Exception as e:
-                removal_error = True
-                print("Failed to remove file: {}".format(e))
-
-        if removal_error:
-            print("")
+        for directory, path_filter in (
+            (("Drivers",), lambda relative_path, source_path: not relative_path.endswith(".efi") or relative_path in driver_loaded),
+            (("Tools",), lambda relative_path, source_path: not relative_path.endswith(".efi") or relative_path in tool_loaded),
+            (("Resources", "Image"), is_picker_variant_used)
+        ):
+            source_directory = os.path.join(source_efi_dir, "EFI", "OC", *directory)
+            if os.path.exists(source_directory):
+                self.materializer.copy_tree(source_directory, os.path.join(self.result_dir, "EFI", "OC", *directory), path_filter)
 
         print("Done")
         print("")
@@ -269,6 +261,9 @@ class OCPE:
             self.u.head()
             print("")
             print("Hardware Report: {}".format("No report selected" if not hardware_report_path else hardware_report_path))
+            update_status = self.updater.get_update_status()
+            if update_status:
+                print("Update Status: {}".format(update_status))
             print("")
             if hardware_report_path:
                 print("* Hardware Compatibility:")
@@ -290,11 +285,15 @@ class OCPE:
             print("5. Customize SMBIOS Model")
             print("6. Build OpenCore EFI")
             print("")
+            print("U. Check for Updates")
             print("Q. Quit")
             print("")
             option = self.u.request_input("Select an option: ")
             if option.lower() == "q":
                 self.u.exit_program()
+            if option.lower() == "u":
+                self.updater.run_update()
+                continue
 
             try:
                 option = int(option)
@@ -312,6 +311,7 @@ class OCPE:
                     self.ac.select_acpi_tables()
                 self.ac.select_acpi_patches(hardware_report, unsupported_devices, smbios_model)
                 self.k.select_required_kexts(hardware_report, smbios_model, macos_version, needs_oclp, self.ac.patches)
+                self.o.start_prefetch(self.k.kexts, macos_version)
             elif option < 7:
                 try:
                     hardware_report
@@ -324,29 +324,45 @@ class OCPE:
                     hardware_report, unsupported_devices, needs_oclp = self.c.get_unsupported_devices(macos_version)
                     smbios_model = self.s.select_smbios_model(hardware_report, macos_version)
                     self.k.select_required_kexts(hardware_report, smbios_model, macos_version, needs_oclp, self.ac.patches)
+                    self.o.start_prefetch(self.k.kexts, macos_version)
                 elif option == 3:
                     self.ac.customize_patch_selection(hardware_report, unsupported_devices, smbios_model)
                 elif option == 4:
                     self.k.kext_configuration_menu(hardware_report, smbios_model, macos_version, self.ac.patches)
+                    self.o.start_prefetch(self.k.kexts, macos_version)
                 elif option == 5:
                     smbios_model = self.s.customize_smbios_model(hardware_report, smbios_model, macos_version)
                     self.k.select_required_kexts(hardware_report, smbios_model, macos_version, needs_oclp, self.ac.patches)
+                    self.o.start_prefetch(self.k.kexts, macos_version)
                 elif option == 6:
                     self.gathering_files(macos_version)
                     self.build_opencore_efi(hardware_report, unsupported_devices, smbios_model, macos_version, needs_oclp)
                     self.results(hardware_report, smbios_model)
 
 if __name__ == '__main__':
-    update_flag = updater.Updater().run_update()
-    if update_flag:
-        os.execv(sys.executable, ['python3'] + sys.argv)
+    if len(sys.argv) == 3 and sys.argv[1] in ("export-cache", "import-cache"):
+        bundle = cache_bundle.CacheBundle()
+        if sys.argv[1] == "export-cache":
+            manifest = bundle.export_cache(sys.argv[2])
+            print("Exported {} files to {}".format(len(manifest.get("files")), sys.argv[2]))
+        else:
+            manifest = bundle.import_cache(sys.argv[2])
+            print("Imported {} files from {}, EFIs will be built without network access".format(len(manifest.get("files")), sys.argv[2]))
+        sys.exit(0)
 
     o = OCPE()
-    while True:
-        try:
-            o.main()
-        except Exception as e:
-            o.u.head("An Error Occurred")
-            print("")
-            print(traceback.format_exc())
-            o.u.request_input()
\ No newline at end of file
+    if not o.o.offline:
+        o.updater.start_background_check()
+
+    try:
+        while True:
+            try:
+                o.main()
+            except Exception as e:
+                o.u.head("An Error Occurred")
+                print("")
+                print(traceback.format_exc())
+                o.u.request_input()
+    finally:
+        # Quitting or Ctrl-C must not wait for a background prefetch to finish its downloads
+        o.o.cancel_prefetch()
\ No newline at end of file
@@ -6,6 +6,7 @@ from Scripts.datasets import cpu_data
 from Scripts.datasets import pci_data
 from Scripts import smbios
 from Scripts import dsdt
+from Scripts import job_executor
 from Scripts import run
 from Scripts import utils
 import os
@@ -19,6 +20,7 @@ class ACPIGuru:
         self.acpi = dsdt.DSDT()
         self.smbios = smbios.SMBIOS()
         self.run = run.Run().run
+        self.job_executor = job_executor.JobExecutor()
         self.utils = utils.Utils()
         self.patches = acpi_patch_data.patches
         self.hardware_report = None
@@ -27,6 +29,7 @@ class ACPIGuru:
         self.smbios_model = None
         self.dsdt = None
         self.lpc_bus_device = None
+        self.pending_ssdts = None
         self.osi_strings = {
             "Windows 2000": "Windows 2000",
             "Windows XP": "Windows 2001",
@@ -1197,12 +1200,12 @@ DefinitionBlock ("", "SSDT", 2, "ZPSS", "RTCAWAC", 0x00000000)
         #self.patch_warn()
         #self.u.grab("Press [enter] to return...")
         
-        if self.write_ssdt(ssdt_name, ssdt):
+        if self.write_ssdt(ssdt_name, ssdt, defer=False):
             return {
                 "Add": [
                     {
                         "Comment": comment,
-                        "Enabled": self.write_ssdt(ssdt_name, ssdt),
+                        "Enabled": True,
                         "Path": ssdt_name + ".aml"
                     }
                 ],
@@ -1434,26 +1437,50 @@ DefinitionBlock ("", "SSDT", 2, "ZPSS", "EC", 0x00001000)
             "Patch": patches
         }
 
-    def write_ssdt(self, ssdt_name, ssdt_content, compile=True):
+    def write_ssdt(self, ssdt_name, ssdt_content, compile=True, defer=True):
         dsl_path = os.path.join(self.acpi_directory, ssdt_name + ".dsl")
-        aml_path = os.path.join(self.acpi_directory, ssdt_name + ".aml")
 
         with open(dsl_path,"w") as f:
             f.write(ssdt_content)
 
         if not compile:
             return False
+
+        # Inside a batch the compile is queued and reported as enabled until compile_ssdts says otherwise
+        if defer and self.pending_ssdts is not None:
+            self.pending_ssdts[ssdt_name] = dsl_path
+            return True
         
         output = self.run({
             "args":[self.acpi.iasl, dsl_path]
         })
         
+        return self.finish_ssdt(ssdt_name, output)
+
+    def finish_ssdt(self, ssdt_name, output):
         if output[-1] != 0:
             return False
         else:
-            os.remove(dsl_path)
+            os.remove(os.path.join(self.acpi_directory, ssdt_name + ".dsl"))
         
-        return os.path.exists(aml_path)
+        return os.path.exists(os.path.join(self.acpi_directory, ssdt_name + ".aml"))
+
+    def begin_ssdt_batch(self):
+        self.pending_ssdts = {}
+
+    def compile_ssdts(self):
+        # Compiles every SSDT queued since begin_ssdt_batch in parallel, returns {aml path: compiled}
+        pending_ssdts, self.pending_ssdts = self.pending_ssdts or {}, None
+
+        outputs = self.job_executor.run([
+            {"args":[self.acpi.iasl, dsl_path]}
+            for dsl_path in pending_ssdts.values()
+        ])
+
+        return {
+            ssdt_name + ".aml": self.finish_ssdt(ssdt_name, output)
+            for ssdt_name, output in zip(pending_ssdts, outputs)
+        }
 
     def apply_acpi_patches(self, acpi_patches):
         acpi_patches = [
@@ -1573,7 +1600,7 @@ DefinitionBlock ("", "SSDT", 2, "ZPSS", "MCHC", 0)
             return
         
         try:
-            smbus_device_name = self.acpi.get_device_paths_with_hid("0x001F0003" if self.utils.contains_any(cpu_data.IntelCPUGenerations, self.hardware_report.get("CPU").get("Codename"), start=26) else "0x001F0004", self.dsdt)[0][0].split(".")[-1]
+            smbus_device_name = self.acpi.get_device_paths_with_hid("0x001F0003" if cpu_data.IntelCPUFamilies["broadwell_and_older"].find(self.hardware_report.get("CPU").get("Codename")) else "0x001F0004", self.dsdt)[0][0].split(".")[-1]
         except:
             smbus_device_name = "SBUS"
             
@@ -2447,7 +2474,7 @@ DefinitionBlock("", "SSDT", 2, "ZPSS", "RMNE", 0x00001000)
         }
 
     def is_intel_hedt_cpu(self, cpu_codename):
-        return not self.utils.contains_any(cpu_data.IntelCPUGenerations, cpu_codename, start=21) is None and cpu_codename.endswith(("-X", "-P", "-W", "-E", "-EP", "-EX"))
+        return not cpu_data.IntelCPUFamilies["cascade_lake_and_older"].find(cpu_codename) is None and cpu_codename.endswith(("-X", "-P", "-W", "-E", "-EP", "-EX"))
 
     def fix_system_clock_hedt(self):
         awac_device = self.acpi.get_device_paths_with_hid("ACPI000E", self.dsdt)
@@ -3105,7 +3132,7 @@ DefinitionBlock ("", "SSDT", 2, "ZPSS", "UsbReset", 0x00001000)
         if "HP " in hardware_report.get("Motherboard").get("Name"):
             selected_patches.append("CMOS")
 
-        if "Laptop" in hardware_report.get("Motherboard").get("Platform") and self.utils.contains_any(cpu_data.IntelCPUGenerations, hardware_report.get("CPU").get("Codename"), start=26):
+        if "Laptop" in hardware_report.get("Motherboard").get("Platform") and cpu_data.IntelCPUFamilies["broadwell_and_older"].find(hardware_report.get("CPU").get("Codename")):
             selected_patches.append("FixHPET")
 
         if hardware_report.get("Intel MEI"):
@@ -3116,7 +3143,7 @@ DefinitionBlock ("", "SSDT", 2, "ZPSS", "UsbReset", 0x00001000)
         if "Intel" in hardware_report.get("CPU").get("Manufacturer") or not "MacPro" in smbios_model:
             selected_patches.append("MCHC")
 
-        if self.utils.contains_any(chipset_data.IntelChipsets, hardware_report.get("Motherboard").get("Chipset"), start=89, end=101):
+        if chipset_data.IntelChipsetFamilies["300_series"].find(hardware_report.get("Motherboard").get("Chipset")):
             selected_patches.append("PMC")
 
         if "Sandy Bridge" in hardware_report.get("CPU").get("Codename") or "Ivy Bridge" in hardware_report.get("CPU").get("Codename"):
@@ -3128,7 +3155,7 @@ DefinitionBlock ("", "SSDT", 2, "ZPSS", "UsbReset", 0x00001000)
         for network_name, network_props in hardware_report.get("Network", {}).items():
             device_id = network_props.get("Device ID")
 
-            if self.utils.contains_any(pci_data.NetworkIDs, device_id, start=108, end=219):
+            if pci_data.NetworkFamilies["ethernet"].find(device_id):
                 ethernet_pci = 108
                 break
 
@@ -3138,7 +3165,7 @@ DefinitionBlock ("", "SSDT", 2, "ZPSS", "UsbReset", 0x00001000)
         if hardware_report.get("Motherboard").get("Chipset") in ("C610/X99", "Wellsburg", "X299"):
             selected_patches.append("RTC0")
 
-        if "AMD" in hardware_report.get("CPU").get("Manufacturer") or self.utils.contains_any(chipset_data.IntelChipsets, hardware_report.get("Motherboard").get("Chipset"), start=89):
+        if "AMD" in hardware_report.get("CPU").get("Manufacturer") or chipset_data.IntelChipsetFamilies["300_series_and_newer"].find(hardware_report.get("Motherboard").get("Chipset")):
             selected_patches.append("RTCAWAC")
 
         if "SURFACE" in hardware_report.get("Motherboard").get("Name"):
@@ -3152,7 +3179,7 @@ DefinitionBlock ("", "SSDT", 2, "ZPSS", "UsbReset", 0x00001000)
         if hardware_report.get("Motherboard").get("Chipset") in ("C600/X79", "C610/X99", "Wellsburg"):
             selected_patches.append("UNC")
         
-        if "AMD" in hardware_report.get("CPU").get("Manufacturer") or self.utils.contains_any(chipset_data.IntelChipsets, hardware_report.get("Motherboard").get("Chipset"), start=101):
+        if "AMD" in hardware_report.get("CPU").get("Manufacturer") or chipset_data.IntelChipsetFamilies["400_series_and_newer"].find(hardware_report.get("Motherboard").get("Chipset")):
             selected_patches.append("USB Reset")
 
         selected_patches.append("USBX")
@@ -0,0 +1,151 @@
+from Scripts import utils
+import os
+import shutil
+import hashlib
+import time
+
+class ArtifactStore:
+    def __init__(self, store_dir, max_size=512 * 1024 * 1024):
+        self.utils = utils.Utils()
+        self.store_dir = store_dir
+        self.objects_dir = os.path.join(store_dir, "objects")
+        self.index_path = os.path.join(store_dir, "index.json")
+        self.max_size = max_size
+        self.index = None
+
+    def load_index(self):
+        if self.index is not None:
+            return self.index
+
+        index = self.utils.read_file(self.index_path)
+
+        if not isinstance(index, dict):
+            index = {}
+
+        index.setdefault("objects", {})
+        index.setdefault("manifests", {})
+        self.index = index
+        return index
+
+    def save_index(self):
+        self.utils.create_folder(self.store_dir)
+        temporary_path = os.path.join(self.store_dir, "index.tmp.json")
+        self.utils.write_file(temporary_path, self.load_index())
+        os.replace(temporary_path, self.index_path)
+
+    def get_object_path(self, sha256):
+        return os.path.join(self.objects_dir, sha256[:2], sha256)
+
+    def hash_file(self, file_path):
+        hasher = hashlib.sha256()
+        with open(file_path, "rb") as file_reader:
+            for chunk in iter(lambda: file_reader.read(1024 * 1024), b""):
+                hasher.update(chunk)
+        return hasher.hexdigest()
+
+    def add(self, product_name, version_id, file_path, sha256=None):
+        index = self.load_index()
+        sha256 = sha256 or self.hash_file(file_path)
+        object_path = self.get_object_path(sha256)
+
+        if os.path.exists(object_path):
+            os.remove(file_path)
+        else:
+            self.utils.create_folder(os.path.dirname(object_path))
+            shutil.move(file_path, object_path)
+
+        object_stat = os.stat(object_path)
+        index["objects"][sha256] = {
+            "size": object_stat.st_size,
+            "mtime": object_stat.st_mtime_ns,
+            "last_used": time.time()
+        }
+        index["manifests"].setdefault(product_name, {})[str(version_id)] = sha256
+        self.save_index()
+
+        return object_path
+
+    def get_intact_object(self, product_name, version_id):
+        index = self.load_index()
+        sha256 = index["manifests"].get(product_name, {}).get(str(version_id))
+
+        if not sha256:
+            return None, None
+
+        object_path = self.get_object_path(sha256)
+        object_info = index["objects"].get(sha256)
+
+        if not os.path.exists(object_path) or not object_info:
+            return sha256, None
+
+        # The object is only hashed again when its size or mtime no longer match what was recorded
+        object_stat = os.stat(object_path)
+        if object_stat.st_size != object_info.get("size") or object_stat.st_mtime_ns != object_info.get("mtime"):
+            if object_stat.st_size != object_info.get("size") or self.hash_file(object_path) != sha256:
+                # A truncated or overwritten object is dropped so the next download can replace it
+                os.remove(object_path)
+                return sha256, None
+
+            object_info["mtime"] = object_stat.st_mtime_ns
+            self.save_index()
+
+        return sha256, object_path
+
+    def lookup(self, product_name, version_id, expected_sha256=None):
+        sha256, object_path = self.get_intact_object(product_name, version_id)
+
+        if not object_path or (expected_sha256 and sha256 != expected_sha256.lower()):
+            return None
+
+        self.load_index()["objects"][sha256]["last_used"] = time.time()
+        self.save_index()
+
+        return object_path
+
+    def check_integrity(self, product_name, version_id, sha256):
+        stored_sha256, object_path = self.get_intact_object(product_name, version_id)
+
+        if not stored_sha256:
+            return True
+
+        return stored_sha256 == sha256 and object_path is not None
+
+    def collect_garbage(self, pinned_versions=()):
+        index = self.load_index()
+
+        pinned_objects = set()
+        for product_name, version_id in pinned_versions:
+            sha256 = index["manifests"].get(product_name, {}).get(str(version_id))
+            if sha256:
+                pinned_objects.add(sha256)
+
+        total_size = sum(info.get("size", 0) for info in index["objects"].values())
+        evicted_objects = set()
+
+        # Evict the least recently used archives first, never the ones currently installed
+        for sha256, info in sorted(index["objects"].items(), key=lambda item: item[1].get("last_used", 0)):
+            if total_size <= self.max_size:
+                break
+            if sha256 in pinned_objects:
+                continue
+
+            object_path = self.get_object_path(sha256)
+            if os.path.exists(object_path):
+                os.remove(object_path)
+            total_size -= info.get("size", 0)
+            evicted_objects.add(sha256)
+
+        if not evicted_objects:
+            return
+
+        for sha256 in evicted_objects:
+            del index["objects"][sha256]
+
+        for product_name in list(index["manifests"]):
+            versions = index["manifests"][product_name]
+            for version_id in [version_id for version_id, sha256 in versions.items() if sha256 in evicted_objects]:
+                del versions[version_id]
+            if not versions:
+                del index["manifests"][product_name]
+
+        self.save_index()
@@ -0,0 +1,96 @@
+from Scripts import utils
+import os
+
+class BundleIndex:
+    def __init__(self, ock_files_dir):
+        self.utils = utils.Utils()
+        self.ock_files_dir = ock_files_dir
+        self.index_path = os.path.join(ock_files_dir, "bundle_index.json")
+        self.temporary_path = os.path.join(ock_files_dir, "bundle_index.tmp.json")
+        self.history_path = os.path.join(ock_files_dir, "history.json")
+        self.fingerprint = None
+        self.bundles = {}
+        self.bundles_by_name = {}
+
+    def get_fingerprint(self):
+        # OCK_Files itself is left out, writing the index changes its mtime
+        fingerprint = {
+            "history": os.stat(self.history_path).st_mtime_ns if os.path.exists(self.history_path) else None,
+            "products": {}
+        }
+
+        if os.path.isdir(self.ock_files_dir):
+            with os.scandir(self.ock_files_dir) as entries:
+                for entry in entries:
+                    if entry.is_dir() and not entry.name.startswith("."):
+                        fingerprint["products"][entry.name] = entry.stat().st_mtime_ns
+
+        return fingerprint
+
+    def read_bundle(self, bundle_path):
+        absolute_path = os.path.join(self.ock_files_dir, *bundle_path.split("/"))
+        plist_path = next(self.utils.iterate_matching_paths(absolute_path, extension_filter=".plist", name_filter="Info", prune=lambda relative_path: relative_path.lower().endswith(".kext")), (None,))[0]
+
+        try:
+            bundle_info = self.utils.read_file(os.path.join(absolute_path, plist_path))
+        except Exception:
+            bundle_info = None
+
+        if not isinstance(bundle_info, dict):
+            bundle_info = {}
+
+        executable_path = os.path.join("Contents", "MacOS", bundle_info.get("CFBundleExecutable", "None"))
+        if not os.path.exists(os.path.join(absolute_path, executable_path)):
+            executable_path = ""
+
+        return {
+            "path": bundle_path,
+            "product": bundle_path.split("/")[0],
+            "name": os.path.splitext(os.path.basename(bundle_path))[0],
+            "plist_path": plist_path.replace("\\", "/") if plist_path else None,
+            "executable_path": executable_path.replace("\\", "/"),
+            "info": {
+                "CFBundleIdentifier": bundle_info.get("CFBundleIdentifier"),
+                "CFBundleVersion": bundle_info.get("CFBundleVersion"),
+                "CFBundleExecutable": bundle_info.get("CFBundleExecutable"),
+                "OSBundleLibraries": bundle_info.get("OSBundleLibraries", {})
+            }
+        }
+
+    def build(self):
+        bundles = []
+
+        for bundle_path, type in self.utils.find_matching_paths(self.ock_files_dir, extension_filter=".kext", type_filter="dir", prune=lambda relative_path: os.path.basename(relative_path).startswith(".")):
+            bundles.append(self.read_bundle(bundle_path.replace("\\", "/")))
+
+        return bundles
+
+    def load(self):
+        fingerprint = self.get_fingerprint()
+
+        if fingerprint == self.fingerprint:
+            return self
+
+        index = self.utils.read_file(self.index_path)
+
+        if isinstance(index, dict) and index.get("fingerprint") == fingerprint:
+            bundles = index.get("bundles", [])
+        else:
+            bundles = self.build()
+            if os.path.isdir(self.ock_files_dir):
+                self.utils.write_file(self.temporary_path, {"fingerprint": fingerprint, "bundles": bundles})
+                os.replace(self.temporary_path, self.index_path)
+
+        self.fingerprint = fingerprint
+        self.bundles = {bundle["path"]: bundle for bundle in bundles}
+        self.bundles_by_name = {}
+        for bundle in bundles:
+            self.bundles_by_name.setdefault(bundle["name"], []).append(bundle)
+
+        return self
+
+    def get(self, bundle_path):
+        return self.bundles.get(bundle_path)
+
+    def find_bundles(self, name):
+        return self.bundles_by_name.get(name, [])
@@ -0,0 +1,146 @@
+from Scripts import run
+from Scripts import utils
+import os
+import shutil
+import hashlib
+import json
+import tempfile
+import time
+import zipfile
+
+class CacheBundle:
+    def __init__(self):
+        self.utils = utils.Utils()
+        self.run = run.Run().run
+        self.format_version = 1
+        self.root_dir = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+        self.scripts_dir = os.path.join(self.root_dir, "Scripts")
+        self.ock_files_dir = os.path.join(self.root_dir, "OCK_Files")
+        self.bootloader_kexts_data_path = os.path.join(self.root_dir, "bootloader_kexts_data.json")
+        self.bundle_manifest_path = os.path.join(self.ock_files_dir, "bundle_manifest.json")
+        self.tool_prefixes = ("iasl", "macserial", "acpidump")
+
+    def hash_file(self, file_path):
+        hasher = hashlib.sha256()
+        with open(file_path, "rb") as file_reader:
+            for chunk in iter(lambda: file_reader.read(1024 * 1024), b""):
+                hasher.update(chunk)
+        return hasher.hexdigest()
+
+    def get_bundle_files(self):
+        bundle_files = []
+
+        for root, dirs, files in os.walk(self.ock_files_dir):
+            # The artifact store only keeps archives for rollback and partial downloads are only resumed on this machine,
+            # the extracted files are enough to build offline
+            dirs[:] = [name for name in dirs if not (root == self.ock_files_dir and name in (".store", ".downloads"))]
+            for name in files:
+                file_path = os.path.join(root, name)
+                if file_path != self.bundle_manifest_path:
+                    bundle_files.append(file_path)
+
+        if os.path.isfile(self.bootloader_kexts_data_path):
+            bundle_files.append(self.bootloader_kexts_data_path)
+
+        for name in os.listdir(self.scripts_dir):
+            if name.lower().startswith(self.tool_prefixes) and os.path.isfile(os.path.join(self.scripts_dir, name)):
+                bundle_files.append(os.path.join(self.scripts_dir, name))
+
+        return sorted(bundle_files)
+
+    def export_cache(self, bundle_path):
+        if not os.path.isfile(os.path.join(self.ock_files_dir, "history.json")):
+            raise FileNotFoundError("OCK_Files has not been gathered yet, build an EFI once before exporting the cache.")
+
+        manifest = {
+            "format_version": self.format_version,
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "files": {}
+        }
+
+        temporary_path = bundle_path + ".tmp"
+        with zipfile.ZipFile(temporary_path, "w", zipfile.ZIP_DEFLATED) as bundle:
+            for file_path in self.get_bundle_files():
+                relative_path = os.path.relpath(file_path, self.root_dir).replace(os.sep, "/")
+                manifest["files"][relative_path] = {
+                    "sha256": self.hash_file(file_path),
+                    "size": os.path.getsize(file_path)
+                }
+                bundle.write(file_path, relative_path)
+            bundle.writestr("manifest.json", json.dumps(manifest, indent=4))
+        os.replace(temporary_path, bundle_path)
+
+        return manifest
+
+    def is_safe_path(self, relative_path):
+        parts = relative_path.split("/")
+
+        # Backslashes and drive letters are path syntax on Windows, so no part may contain them
+        if any(part in ("", ".", "..") or "\\" in part or ":" in part for part in parts):
+            return False
+
+        return parts[0] in ("OCK_Files", "Scripts", "bootloader_kexts_data.json") and (parts[0] != "Scripts" or len(parts) == 2 and parts[1].lower().startswith(self.tool_prefixes))
+
+    def import_cache(self, bundle_path):
+        staging_dir = os.path.normpath(os.path.abspath(tempfile.mkdtemp()))
+
+        try:
+            with zipfile.ZipFile(bundle_path) as bundle:
+                manifest = json.loads(bundle.read("manifest.json"))
+
+                if not isinstance(manifest, dict) or manifest.get("format_version") != self.format_version:
+                    raise ValueError("Unsupported cache bundle format version: {}".format(manifest.get("format_version") if isinstance(manifest, dict) else None))
+
+                files = manifest.get("files", {})
+                for relative_path, file_info in files.items():
+                    if not self.is_safe_path(relative_path):
+                        raise ValueError("Cache bundle contains an invalid path: {}".format(relative_path))
+
+                    destination_path = os.path.normpath(os.path.join(staging_dir, *relative_path.split("/")))
+                    if os.path.commonpath([staging_dir, destination_path]) != staging_dir:
+                        raise ValueError("Cache bundle contains an invalid path: {}".format(relative_path))
+
+                    self.utils.create_folder(os.path.dirname(destination_path))
+                    with bundle.open(relative_path) as source, open(destination_path, "wb") as destination:
+                        shutil.copyfileobj(source, destination)
+
+                    if os.path.getsize(destination_path) != file_info.get("size") or self.hash_file(destination_path) != file_info.get("sha256"):
+                        raise ValueError("Cache bundle file {} is corrupted".format(relative_path))
+
+            staged_ock_files_dir = os.path.join(staging_dir, "OCK_Files")
+            if not os.path.isfile(os.path.join(staged_ock_files_dir, "history.json")):
+                raise ValueError("Cache bundle does not contain OCK_Files/history.json")
+
+            # The current artifact store is kept so archives downloaded on this machine stay available
+            store_dir = os.path.join(self.ock_files_dir, ".store")
+            if os.path.isdir(store_dir):
+                shutil.move(store_dir, os.path.join(staged_ock_files_dir, ".store"))
+            self.utils.write_file(os.path.join(staged_ock_files_dir, "bundle_manifest.json"), manifest)
+
+            previous_ock_files_dir = self.ock_files_dir + ".old"
+            shutil.rmtree(previous_ock_files_dir, ignore_errors=True)
+            if os.path.isdir(self.ock_files_dir):
+                os.replace(self.ock_files_dir, previous_ock_files_dir)
+            shutil.move(staged_ock_files_dir, self.ock_files_dir)
+            shutil.rmtree(previous_ock_files_dir, ignore_errors=True)
+
+            staged_data_path = os.path.join(staging_dir, "bootloader_kexts_data.json")
+            if os.path.isfile(staged_data_path):
+                shutil.move(staged_data_path, self.bootloader_kexts_data_path)
+
+            staged_scripts_dir = os.path.join(staging_dir, "Scripts")
+            if os.path.isdir(staged_scripts_dir):
+                for name in os.listdir(staged_scripts_dir):
+                    destination_path = os.path.join(self.scripts_dir, name)
+                    shutil.move(os.path.join(staged_scripts_dir, name), destination_path)
+                    if os.name != "nt":
+                        self.run({
+                            "args":["chmod", "+x", destination_path]
+                        })
+        finally:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+
+        return manifest
+
+    def is_offline(self):
+        return os.path.isfile(self.bundle_manifest_path)
@@ -17,10 +17,10 @@ class CompatibilityChecker:
         if not device_compatibility[0]:
             return "\033[0;31mUnsupported\033[0m"
         
-        max_compatibility = self.utils.parse_darwin_version(device_compatibility[0])[0]
-        min_compatibility = self.utils.parse_darwin_version(device_compatibility[-1])[0]
-        max_version = self.utils.parse_darwin_version(os_data.get_latest_darwin_version())[0]
-        min_version = self.utils.parse_darwin_version(os_data.get_lowest_darwin_version())[0]
+        max_compatibility = os_data.DarwinVersion(device_compatibility[0]).major
+        min_compatibility = os_data.DarwinVersion(device_compatibility[-1]).major
+        max_version = os_data.get_latest_darwin_version().major
+        min_version = os_data.get_lowest_darwin_version().major
 
         if min_version < min_compatibility and max_compatibility < max_version:
             return "\033[1;32m{} - {}\033[0m".format(
@@ -105,7 +105,7 @@ class CompatibilityChecker:
                 else:
                     max_version = min_version = None
 
-                if self.is_low_end_intel_cpu(self.hardware_report.get("CPU").get("Processor Name")) or self.utils.contains_any(chipset_data.IntelChipsets, self.hardware_report.get("Motherboard").get("Chipset"), start=116, end=130):
+                if self.is_low_end_intel_cpu(self.hardware_report.get("CPU").get("Processor Name")) or chipset_data.IntelChipsetFamilies["500_series"].find(self.hardware_report.get("Motherboard").get("Chipset")):
                     max_version = min_version = None
             elif "AMD" in gpu_manufacturer:
                 if "Navi 2" in gpu_codename:
@@ -156,7 +156,7 @@ class CompatibilityChecker:
             else:
                 gpu_props["Compatibility"] = (max_version, min_version)
                 if max_version != ocl_patched_max_version:
-                    gpu_props["OCLP Compatibility"] = (ocl_patched_max_version, ocl_patched_min_version if self.utils.parse_darwin_version(ocl_patched_min_version) > self.utils.parse_darwin_version("{}.{}.{}".format(int(max_version[:2]) + 1, 0, 0)) else "{}.{}.{}".format(int(max_version[:2]) + 1, 0, 0))
+                    gpu_props["OCLP Compatibility"] = (ocl_patched_max_version, ocl_patched_min_version if os_data.DarwinVersion(ocl_patched_min_version) > os_data.DarwinVersion("{}.{}.{}".format(int(max_version[:2]) + 1, 0, 0)) else "{}.{}.{}".format(int(max_version[:2]) + 1, 0, 0))
 
             print("{}- {}: {}{}".format(
                 " "*3, 
@@ -230,7 +230,7 @@ class CompatibilityChecker:
                         if device_id in ("14E4-43A0", "14E4-43A3", "14E4-43BA"):
                             max_version = "22.99.99"
                             device_props["OCLP Compatibility"] = (ocl_patched_max_version, ocl_patched_min_version)
-                            self.ocl_patched_macos_version = (ocl_patched_max_version, self.ocl_patched_macos_version[-1] if self.ocl_patched_macos_version and self.utils.parse_darwin_version(self.ocl_patched_macos_version[-1]) < self.utils.parse_darwin_version(device_props.get("OCLP Compatibility")[-1]) else device_props.get("OCLP Compatibility")[-1])
+                            self.ocl_patched_macos_version = (ocl_patched_max_version, self.ocl_patched_macos_version[-1] if self.ocl_patched_macos_version and os_data.DarwinVersion(self.ocl_patched_macos_version[-1]) < os_data.DarwinVersion(device_props.get("OCLP Compatibility")[-1]) else device_props.get("OCLP Compatibility")[-1])
                         device_props["Compatibility"] = (max_version, min_version)
                         primary_wifi_device = None
                     else:
@@ -276,7 +276,7 @@ class CompatibilityChecker:
             new_hardware_report[device_type] = {}
 
             for device_name, device_props in devices.items():
-                if device_props.get("OCLP Compatibility") and self.utils.parse_darwin_version(device_props.get("OCLP Compatibility")[0]) >= self.utils.parse_darwin_version(macos_verison) >= self.utils.parse_darwin_version(device_props.get("OCLP Compatibility")[-1]):
+                if device_props.get("OCLP Compatibility") and os_data.DarwinVersion(device_props.get("OCLP Compatibility")[0]) >= os_data.DarwinVersion(macos_verison) >= os_data.DarwinVersion(device_props.get("OCLP Compatibility")[-1]):
                     new_hardware_report[device_type][device_name] = device_props
                     needs_oclp = True
                     continue
@@ -284,7 +284,7 @@ class CompatibilityChecker:
                 device_compatibility = device_props.get("Compatibility")
 
                 if device_compatibility:
-                    if device_compatibility[0] is None or not self.utils.parse_darwin_version(device_compatibility[0]) >= self.utils.parse_darwin_version(macos_verison) >= self.utils.parse_darwin_version(device_compatibility[-1]):
+                    if device_compatibility[0] is None or not os_data.DarwinVersion(device_compatibility[0]) >= os_data.DarwinVersion(macos_verison) >= os_data.DarwinVersion(device_compatibility[-1]):
                         unsupported_device["{}: {}".format(device_props.get("Device Type") or device_type, device_name if not device_props.get("Device ID") in pci_data.UnsupportedNVMeSSDIDs else pci_data.UnsupportedNVMeSSDIDs.get(device_props.get("Device ID")))] = device_props
                     else:
                         new_hardware_report[device_type][device_name] = device_props
@@ -340,18 +340,18 @@ class CompatibilityChecker:
                             del gpu_props["OCLP Compatibility"]
 
                 max_version, min_version = gpu_props.get("Compatibility")
-                max_supported_gpu_version = max_version if not max_supported_gpu_version else max_version if self.utils.parse_darwin_version(max_version) > self.utils.parse_darwin_version(max_supported_gpu_version) else max_supported_gpu_version
-                min_supported_gpu_version = min_version if not min_supported_gpu_version else min_version if self.utils.parse_darwin_version(min_version) < self.utils.parse_darwin_version(min_supported_gpu_version) else min_supported_gpu_version
+                max_supported_gpu_version = max_version if not max_supported_gpu_version else max_version if os_data.DarwinVersion(max_version) > os_data.DarwinVersion(max_supported_gpu_version) else max_supported_gpu_version
+                min_supported_gpu_version = min_version if not min_supported_gpu_version else min_version if os_data.DarwinVersion(min_version) < os_data.DarwinVersion(min_supported_gpu_version) else min_supported_gpu_version
 
             if gpu_props.get("OCLP Compatibility"):
-                self.ocl_patched_macos_version = (gpu_props.get("OCLP Compatibility")[0], self.ocl_patched_macos_version[-1] if self.ocl_patched_macos_version and self.utils.parse_darwin_version(self.ocl_patched_macos_version[-1]) < self.utils.parse_darwin_version(gpu_props.get("OCLP Compatibility")[-1]) else gpu_props.get("OCLP Compatibility")[-1])
+                self.ocl_patched_macos_version = (gpu_props.get("OCLP Compatibility")[0], self.ocl_patched_macos_version[-1] if self.ocl_patched_macos_version and os_data.DarwinVersion(self.ocl_patched_macos_version[-1]) < os_data.DarwinVersion(gpu_props.get("OCLP Compatibility")[-1]) else gpu_props.get("OCLP Compatibility")[-1])
         
         if max_supported_gpu_version == min_supported_gpu_version and max_supported_gpu_version == None:
             self.utils.request_input("\n\nNo compatible GPU card for macOS was found!")
             self.utils.exit_program()
 
-        self.max_native_macos_version = max_supported_gpu_version if self.utils.parse_darwin_version(max_supported_gpu_version) < self.utils.parse_darwin_version(self.max_native_macos_version) else self.max_native_macos_version
-        self.min_native_macos_version = min_supported_gpu_version if self.utils.parse_darwin_version(min_supported_gpu_version) > self.utils.parse_darwin_version(self.min_native_macos_version) else self.min_native_macos_version
+        self.max_native_macos_version = max_supported_gpu_version if os_data.DarwinVersion(max_supported_gpu_version) < os_data.DarwinVersion(self.max_native_macos_version) else self.max_native_macos_version
+        self.min_native_macos_version = min_supported_gpu_version if os_data.DarwinVersion(min_supported_gpu_version) > os_data.DarwinVersion(self.min_native_macos_version) else self.min_native_macos_version
 
         if discrete_gpu_mode == "Unknown":
             print("")
@@ -44,7 +44,7 @@ class ConfigProdigy:
         booter_patch = []
 
         mac_device = mac_model_data.get_mac_device_by_name(smbios_model)
-        if not self.utils.parse_darwin_version(mac_device.initial_support) <= self.utils.parse_darwin_version(macos_version) <= self.utils.parse_darwin_version(mac_device.last_supported_version):
+        if not os_data.DarwinVersion(macos_version).is_between(mac_device.initial_support, mac_device.last_supported_version):
             booter_patch.append({
                 "Arch": "x86_64",
                 "Comment": "Skip Board ID check",
@@ -63,8 +63,8 @@ class ConfigProdigy:
 
     def check_mats_support(self, cpu_manufacturer, motherboard_chipset):
         return "AMD" in cpu_manufacturer or \
-            not self.utils.contains_any(chipset_data.IntelChipsets, motherboard_chipset, start=101) is None or \
-            not self.utils.contains_any(chipset_data.IntelChipsets, motherboard_chipset, start=79, end=89) is None
+            not chipset_data.IntelChipsetFamilies["400_series_and_newer"].find(motherboard_chipset) is None or \
+            not chipset_data.IntelChipsetFamilies["c620_x299_series"].find(motherboard_chipset) is None
 
     def is_low_end_intel_cpu(self, processor_name):
         return any(cpu_branding in processor_name for cpu_branding in ("Celeron", "Pentium"))
@@ -138,7 +138,7 @@ class ConfigProdigy:
                 igpu_properties["AAPL,ig-platform-id"] = "06002616"
             igpu_properties["framebuffer-stolenmem"] = "00003001"
             igpu_properties["framebuffer-fbmem"] = "00009000"
-        elif device_id.startswith(("09", "19")) and self.utils.parse_darwin_version(macos_version) < self.utils.parse_darwin_version("22.0.0"):
+        elif device_id.startswith(("09", "19")) and os_data.DarwinVersion(macos_version) < os_data.DarwinVersion("22.0.0"):
             native_supported_ids = ("1916", "191E", "1926", "1927", "1912", "1932", "1902", "1917", "193B", "191B")
             if not device_id in native_supported_ids:
                 igpu_properties["device-id"] = "1B190000"
@@ -199,7 +199,7 @@ class ConfigProdigy:
                 if not any(monitor_info.get("Connected GPU") == integrated_gpu[0] for monitor_name, monitor_info in monitor.items()):
                     igpu_properties["AAPL,ig-platform-id"] = "0300913E" if not device_id.startswith("9B") else "0300C89B"
                     return igpu_properties
-                igpu_properties["AAPL,ig-platform-id"] = "07009B3E" if self.utils.parse_darwin_version(macos_version) < self.utils.parse_darwin_version("19.5.0") else "00009B3E"
+                igpu_properties["AAPL,ig-platform-id"] = "07009B3E" if os_data.DarwinVersion(macos_version) < os_data.DarwinVersion("19.5.0") else "00009B3E"
             elif platform == "NUC":
                 igpu_properties["AAPL,ig-platform-id"] = "07009B3E"
                 if device_id.startswith(("3EA5", "3EA8")):
@@ -239,11 +239,11 @@ class ConfigProdigy:
 
         for kext in kexts:
             if kext.checked:
-                if kext.name == "AirportItlwm" and self.utils.parse_darwin_version("24.0.0") <= self.utils.parse_darwin_version(macos_version):
+                if kext.name == "AirportItlwm" and os_data.DarwinVersion("24.0.0") <= os_data.DarwinVersion(macos_version):
                     for network_name, network_props in hardware_report.get("Network", {}).items():
                         device_id = network_props.get("Device ID")
 
-                        if self.utils.contains_any(pci_data.NetworkIDs, device_id, start=21, end=108) and network_props.get("PCI Path"):
+                        if pci_data.NetworkFamilies["intel_wifi"].find(device_id) and network_props.get("PCI Path"):
                             deviceproperties_add[network_props.get("PCI Path")] = {
                                 "IOName": "pci14e4,43a0",
                                 "compatible": "pci106b,117",
@@ -323,10 +323,10 @@ class ConfigProdigy:
         return kernel_block
 
     def is_low_end_haswell_plus(self, processor_name, cpu_codename):
-        return self.is_low_end_intel_cpu(processor_name) and not self.utils.contains_any(cpu_data.IntelCPUGenerations, cpu_codename, end=38) is None
+        return self.is_low_end_intel_cpu(processor_name) and not cpu_data.IntelCPUFamilies["haswell_and_newer"].find(cpu_codename) is None
 
     def is_intel_hedt_cpu(self, cpu_codename):
-        return not self.utils.contains_any(cpu_data.IntelCPUGenerations, cpu_codename, start=21) is None and cpu_codename.endswith(("-X", "-P", "-W", "-E", "-EP", "-EX"))
+        return not cpu_data.IntelCPUFamilies["cascade_lake_and_older"].find(cpu_codename) is None and cpu_codename.endswith(("-X", "-P", "-W", "-E", "-EP", "-EX"))
             
     def spoof_cpuid(self, processor_name, cpu_codename, macos_version):
         if self.is_low_end_haswell_plus(processor_name, cpu_codename):
@@ -335,10 +335,10 @@ class ConfigProdigy:
             return self.cpuids.get("Haswell")
         elif "Broadwell" in cpu_codename and self.is_intel_hedt_cpu(cpu_codename):
             return self.cpuids.get("Broadwell")
-        elif "Ice Lake" not in cpu_codename and self.utils.contains_any(cpu_data.IntelCPUGenerations, cpu_codename, end=10):
+        elif "Ice Lake" not in cpu_codename and cpu_data.IntelCPUFamilies["comet_lake_and_newer"].find(cpu_codename):
             if not "Comet Lake" in cpu_codename:
                 return self.cpuids.get("Comet Lake")
-            if self.utils.parse_darwin_version(macos_version) < self.utils.parse_darwin_version("19.0.0"):
+            if os_data.DarwinVersion(macos_version) < os_data.DarwinVersion("19.0.0"):
                 return self.cpuids.get("Coffee Lake")
             
         return None
@@ -377,7 +377,7 @@ class ConfigProdigy:
                 patch["Replace"] = patch["Replace"].hex()
                 patch["Replace"] = self.utils.hex_to_bytes(patch["Replace"][:2] + self.utils.int_to_hex(int(cpu_cores)) + patch["Replace"][4:])
             elif "IOPCIIsHotplugPort" in patch["Comment"]:
-                if self.utils.contains_any(chipset_data.AMDChipsets, motherboard_chipset, start=17):
+                if chipset_data.AMDChipsetFamilies["600_series_and_newer"].find(motherboard_chipset):
                     patch["Enabled"] = True
             if "_mtrr_update_action" in patch["Comment"]:
                 if "TRX" in motherboard_chipset.upper():
@@ -404,13 +404,13 @@ class ConfigProdigy:
             if not kext.checked:
                 continue
 
-            if "Lilu" in kext.requires_kexts and not self.utils.parse_darwin_version(kext.min_darwin_version) <= self.utils.parse_darwin_version(macos_version) <= self.utils.parse_darwin_version(kext.max_darwin_version):
+            if "Lilu" in kext.requires_kexts and not os_data.DarwinVersion(macos_version).is_between(kext.min_darwin_version, kext.max_darwin_version):
                 if not "-lilubetaall" in boot_args:
                     boot_args.append("-lilubetaall")
 
             if kext.name == "WhateverGreen":
                 if  any(tuple(map(int, "3840x2160".split("x"))) <= tuple(map(int, monitor_info.get("Resolution").split("x"))) for monitor_name, monitor_info in hardware_report.get("Monitor", {}).items()) and \
-                    self.utils.parse_darwin_version(macos_version) < self.utils.parse_darwin_version("20.0.0"):
+                    os_data.DarwinVersion(macos_version) < os_data.DarwinVersion("20.0.0"):
                     boot_args.append("-cdfon")
 
                 if  "Intel" in hardware_report.get("CPU").get("Manufacturer") and \
@@ -420,7 +420,7 @@ class ConfigProdigy:
                         boot_args.append("ipc_control_port_options=0")
 
                     if  intergrated_gpu[-1].get("Device ID")[5:].startswith(("3E", "87", "9B")) and \
-                        self.utils.parse_darwin_version(macos_version) >= self.utils.parse_darwin_version("19.4.0"):
+                        os_data.DarwinVersion(macos_version) >= os_data.DarwinVersion("19.4.0"):
                         boot_args.append("igfxonln=1")
 
                     if "Ice Lake" in intergrated_gpu[-1].get("Codename"):
@@ -431,7 +431,7 @@ class ConfigProdigy:
                             boot_args.append("-igfxvesa")
                     elif "Laptop" in hardware_report.get("Motherboard").get("Platform"):
                         if intergrated_gpu[-1].get("Device ID")[5:].startswith(("59", "8C", "3E", "87", "9B")) and not intergrated_gpu[-1].get("Device ID").endswith("5917"):
-                            boot_args.append("-igfxbl{}".format("t" if self.utils.parse_darwin_version(macos_version) >= self.utils.parse_darwin_version("22.5.0") else "r"))
+                            boot_args.append("-igfxbl{}".format("t" if os_data.DarwinVersion(macos_version) >= os_data.DarwinVersion("22.5.0") else "r"))
 
                 discrete_gpu = list(hardware_report.get("GPU").items())[0][-1]
                 if discrete_gpu.get("Device Type") == "Discrete GPU":
@@ -449,7 +449,7 @@ class ConfigProdigy:
 
                     if needs_oclp:
                         if discrete_gpu.get("Manufacturer") == "AMD":
-                            boot_args.append("-radvesa" if self.utils.parse_darwin_version(macos_version) < self.utils.parse_darwin_version("23.0.0") else "-amd_no_dgpu_accel")
+                            boot_args.append("-radvesa" if os_data.DarwinVersion(macos_version) < os_data.DarwinVersion("23.0.0") else "-amd_no_dgpu_accel")
                         elif discrete_gpu.get("Manufacturer") == "NVIDIA" and not "Kepler" in discrete_gpu.get("Codename"):
                             boot_args.extend(("nvda_drv_vrl=1", "ngfxcompat=1", "ngfxgl=1"))
             elif kext.name == "AppleALC":
@@ -467,9 +467,9 @@ class ConfigProdigy:
         return " ".join(boot_args)
     
     def csr_active_config(self, macos_version):
-        if self.utils.parse_darwin_version(macos_version) >= self.utils.parse_darwin_version("20.0.0"):
+        if os_data.DarwinVersion(macos_version) >= os_data.DarwinVersion("20.0.0"):
             return "03080000"
-        elif self.utils.parse_darwin_version(macos_version) >= self.utils.parse_darwin_version("18.0.0"):
+        elif os_data.DarwinVersion(macos_version) >= os_data.DarwinVersion("18.0.0"):
             return "FF070000"
         else:
             return "FF030000"
@@ -506,7 +506,7 @@ class ConfigProdigy:
         config["Booter"]["Quirks"]["DevirtualiseMmio"] = len(config["Booter"]["MmioWhitelist"]) != 0 or config["Booter"]["Quirks"]["DevirtualiseMmio"]
         config["Booter"]["Quirks"]["EnableWriteUnprotector"] = False if "AMD" in hardware_report.get("CPU").get("Manufacturer") else not config["Booter"]["Quirks"]["DevirtualiseMmio"]
         config["Booter"]["Quirks"]["ProtectUefiServices"] = "Z390" in hardware_report.get("Motherboard").get("Chipset") or \
-            not self.utils.contains_any(cpu_data.IntelCPUGenerations, hardware_report.get("CPU").get("Codename"), end=14) is None
+            not cpu_data.IntelCPUFamilies["coffee_lake_and_newer"].find(hardware_report.get("CPU").get("Codename")) is None
         config["Booter"]["Quirks"]["RebuildAppleMemoryMap"] = not config["Booter"]["Quirks"]["EnableWriteUnprotector"]
         config["Booter"]["Quirks"]["ResizeAppleGpuBars"] = 0 if any(gpu_props.get("Resizable BAR", "Disabled") == "Enabled" for gpu_name, gpu_props in hardware_report.get("GPU", {}).items()) else -1
         config["Booter"]["Quirks"]["SetupVirtualMap"] = not (hardware_report.get("Motherboard").get("Chipset") == "TRX40" or \
@@ -535,16 +535,16 @@ class ConfigProdigy:
             list(hardware_report.get("GPU").items())[0][-1].get("Manufacturer"),
             kexts
         )
-        config["Kernel"]["Quirks"]["AppleCpuPmCfgLock"] = not self.utils.contains_any(cpu_data.IntelCPUGenerations, hardware_report.get("CPU").get("Codename"), start=38) is None
+        config["Kernel"]["Quirks"]["AppleCpuPmCfgLock"] = not cpu_data.IntelCPUFamilies["ivy_bridge_and_older"].find(hardware_report.get("CPU").get("Codename")) is None
         config["Kernel"]["Quirks"]["AppleXcpmCfgLock"] = False if "AMD" in hardware_report.get("CPU").get("Manufacturer") else not config["Kernel"]["Quirks"]["AppleCpuPmCfgLock"]
-        config["Kernel"]["Quirks"]["AppleXcpmExtraMsrs"] = "-E" in hardware_report.get("CPU").get("Codename") and not self.utils.contains_any(cpu_data.IntelCPUGenerations, hardware_report.get("CPU").get("Codename"), start=26) is None
+        config["Kernel"]["Quirks"]["AppleXcpmExtraMsrs"] = "-E" in hardware_report.get("CPU").get("Codename") and not cpu_data.IntelCPUFamilies["broadwell_and_older"].find(hardware_report.get("CPU").get("Codename")) is None
         config["Kernel"]["Quirks"]["CustomSMBIOSGuid"] = True
         config["Kernel"]["Quirks"]["DisableIoMapper"] = not "AMD" in hardware_report.get("CPU").get("Manufacturer")
         config["Kernel"]["Quirks"]["DisableRtcChecksum"] = "ASUS" in hardware_report.get("Motherboard").get("Name") or "HP " in hardware_report.get("Motherboard").get("Name")
         config["Kernel"]["Quirks"]["LapicKernelPanic"] = "HP " in hardware_report.get("Motherboard").get("Name")
         config["Kernel"]["Quirks"]["PanicNoKextDump"] = config["Kernel"]["Quirks"]["PowerTimeoutKernelPanic"] = True
         config["Kernel"]["Quirks"]["ProvideCurrentCpuInfo"] = "AMD" in hardware_report.get("CPU").get("Manufacturer") or \
-            not self.utils.contains_any(cpu_data.IntelCPUGenerations, hardware_report.get("CPU").get("Codename"), end=2) is None
+            not cpu_data.IntelCPUFamilies["alder_lake_and_newer"].find(hardware_report.get("CPU").get("Codename")) is None
 
         config["Misc"]["BlessOverride"] = []
         config["Misc"]["Boot"]["HideAuxiliary"] = False
@@ -557,7 +557,7 @@ class ConfigProdigy:
         config["Misc"]["Entries"] = []
         config["Misc"]["Security"]["AllowSetDefault"] = True
         config["Misc"]["Security"]["ScanPolicy"] = 0
-        config["Misc"]["Security"]["SecureBootModel"] = "Default" if not needs_oclp and self.utils.parse_darwin_version("20.0.0") <= self.utils.parse_darwin_version(macos_version) < self.utils.parse_darwin_version("23.0.0") else "Disabled"
+        config["Misc"]["Security"]["SecureBootModel"] = "Default" if not needs_oclp and os_data.DarwinVersion("20.0.0") <= os_data.DarwinVersion(macos_version) < os_data.DarwinVersion("23.0.0") else "Disabled"
         config["Misc"]["Security"]["Vault"] = "Optional"
         config["Misc"]["Tools"] = []
 
@@ -573,7 +573,7 @@ class ConfigProdigy:
 
         config["UEFI"]["APFS"]["MinDate"] = config["UEFI"]["APFS"]["MinVersion"] = -1
         config["UEFI"]["Drivers"] = self.load_drivers()
-        config["UEFI"]["Quirks"]["IgnoreInvalidFlexRatio"] = not self.utils.contains_any(cpu_data.IntelCPUGenerations, hardware_report.get("CPU").get("Codename"), start=26) is None
+        config["UEFI"]["Quirks"]["IgnoreInvalidFlexRatio"] = not cpu_data.IntelCPUFamilies["broadwell_and_older"].find(hardware_report.get("CPU").get("Codename")) is None
         config["UEFI"]["Quirks"]["ReleaseUsbOwnership"] = True
         config["UEFI"]["Quirks"]["UnblockFsConnect"] = "HP " in hardware_report.get("Motherboard").get("Name")
         config["UEFI"]["ReservedMemory"] = []
@@ -586,14 +586,14 @@ class ConfigProdigy:
                 elif kext.name == "RestrictEvents":
                     revpatch = []
                     revblock = []
-                    if self.utils.parse_darwin_version(macos_version) > self.utils.parse_darwin_version("23.0.0") or \
-                        len(config["Booter"]["Patch"]) and self.utils.parse_darwin_version(macos_version) > self.utils.parse_darwin_version("20.4.0"):
+                    if os_data.DarwinVersion(macos_version) > os_data.DarwinVersion("23.0.0") or \
+                        len(config["Booter"]["Patch"]) and os_data.DarwinVersion(macos_version) > os_data.DarwinVersion("20.4.0"):
                         revpatch.append("sbvmm")
                     if  not (" Core" in hardware_report.get("CPU").get("Processor Name") and \
-                        self.utils.contains_any(cpu_data.IntelCPUGenerations, hardware_report.get("CPU").get("Codename"), start=4)):
+                        cpu_data.IntelCPUFamilies["ice_lake_and_older"].find(hardware_report.get("CPU").get("Codename"))):
                         config["NVRAM"]["Add"]["4D1FDA02-38C7-4A6A-9CC6-4BCCA8B30102"]["revcpu"] = 1
                         config["NVRAM"]["Add"]["4D1FDA02-38C7-4A6A-9CC6-4BCCA8B30102"]["revcpuname"] = hardware_report.get("CPU").get("Processor Name")
-                        if self.utils.parse_darwin_version(macos_version) > self.utils.parse_darwin_version("23.0.0"):
+                        if os_data.DarwinVersion(macos_version) > os_data.DarwinVersion("23.0.0"):
                             revpatch.append("cpuname")
                         config["PlatformInfo"]["Generic"]["ProcessorType"] = 1537 if int(hardware_report.get("CPU").get("Core Count")) < 8 else 3841
                     if  "Intel" in hardware_report.get("CPU").get("Manufacturer") and \
@@ -601,7 +601,7 @@ class ConfigProdigy:
                         intergrated_gpu = list(hardware_report.get("GPU").items())[-1][-1]
                         if needs_oclp and intergrated_gpu.get("OCLP Compatibility"):
                             config["NVRAM"]["Add"]["4D1FDA02-38C7-4A6A-9CC6-4BCCA8B30102"]["OCLP-Settings"] = "-allow_amfi"
-                            if self.utils.parse_darwin_version(macos_version) >= self.utils.parse_darwin_version("20.4.0"):
+                            if os_data.DarwinVersion(macos_version) >= os_data.DarwinVersion("20.4.0"):
                                 if intergrated_gpu.get("Codename") in ("Broadwell", "Haswell", "Ivy Bridge", "Sandy Bridge"):
                                     revblock.append("media")
                                 if intergrated_gpu.get("Codename") in ("Kaby Lake", "Skylake", "Broadwell", "Haswell"):
@@ -1,3 +1,5 @@
+from Scripts import substring_matcher
+
 IntelChipsets = [
     "Cougar Point",
     "Z68",
@@ -184,4 +186,17 @@ AMDChipsets = [
     "X670",
     "X870",
     "X870E"
-]
\ No newline at end of file
+]
+
+# Matchers are built once at import, callers ask for a chipset family instead of slicing the list themselves
+IntelChipsetFamilies = {
+    "c620_x299_series": substring_matcher.SubstringMatcher(IntelChipsets[IntelChipsets.index("C621"):IntelChipsets.index("Cannon Point-LP")]),
+    "300_series": substring_matcher.SubstringMatcher(IntelChipsets[IntelChipsets.index("Cannon Point-LP"):IntelChipsets.index("Comet Lake")]),
+    "300_series_and_newer": substring_matcher.SubstringMatcher(IntelChipsets[IntelChipsets.index("Cannon Point-LP"):]),
+    "400_series_and_newer": substring_matcher.SubstringMatcher(IntelChipsets[IntelChipsets.index("Comet Lake"):]),
+    "500_series": substring_matcher.SubstringMatcher(IntelChipsets[IntelChipsets.index("Rocket Lake"):IntelChipsets.index("Tiger Lake-LP")])
+}
+
+AMDChipsetFamilies = {
+    "600_series_and_newer": substring_matcher.SubstringMatcher(AMDChipsets[AMDChipsets.index("TRX50"):])
+}
\ No newline at end of file
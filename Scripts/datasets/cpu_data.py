@@ -1,3 +1,5 @@
+from Scripts import substring_matcher
+
 AMDCPUGenerations = [
     "Summit Ridge",
     "Whitehaven",
@@ -75,4 +77,16 @@ IntelCPUGenerations = [
     "Ivy Bridge-E",
     "Sandy Bridge",
     "Sandy Bridge-E"
-]
\ No newline at end of file
+]
+
+# Matchers are built once at import, callers ask for a family instead of slicing the list themselves
+IntelCPUFamilies = {
+    "alder_lake_and_newer": substring_matcher.SubstringMatcher(IntelCPUGenerations[:IntelCPUGenerations.index("Rocket Lake-S")]),
+    "comet_lake_and_newer": substring_matcher.SubstringMatcher(IntelCPUGenerations[:IntelCPUGenerations.index("Coffee Lake-S")]),
+    "coffee_lake_and_newer": substring_matcher.SubstringMatcher(IntelCPUGenerations[:IntelCPUGenerations.index("Cannon Lake-U")]),
+    "haswell_and_newer": substring_matcher.SubstringMatcher(IntelCPUGenerations[:IntelCPUGenerations.index("Ivy Bridge")]),
+    "ice_lake_and_older": substring_matcher.SubstringMatcher(IntelCPUGenerations[IntelCPUGenerations.index("Ice Lake-U"):]),
+    "cascade_lake_and_older": substring_matcher.SubstringMatcher(IntelCPUGenerations[IntelCPUGenerations.index("Cascade Lake-X"):]),
+    "broadwell_and_older": substring_matcher.SubstringMatcher(IntelCPUGenerations[IntelCPUGenerations.index("Broadwell"):]),
+    "ivy_bridge_and_older": substring_matcher.SubstringMatcher(IntelCPUGenerations[IntelCPUGenerations.index("Ivy Bridge"):])
+}
\ No newline at end of file
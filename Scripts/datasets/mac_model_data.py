@@ -6,8 +6,8 @@ class MacDevice:
         self.cpu = cpu
         self.cpu_generation = cpu_generation
         self.discrete_gpu = discrete_gpu
-        self.initial_support = initial_support
-        self.last_supported_version = last_supported_version or os_data.get_latest_darwin_version()
+        self.initial_support = os_data.DarwinVersion(initial_support)
+        self.last_supported_version = os_data.DarwinVersion(last_supported_version or os_data.get_latest_darwin_version())
 
 mac_devices = [
     # iMac Models
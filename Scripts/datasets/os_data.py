@@ -1,3 +1,68 @@
+class DarwinVersion(str):
+    # Parsed versions are interned, so comparing dataset constants never splits the same string twice
+    _instances = {}
+
+    def __new__(cls, darwin_version):
+        if isinstance(darwin_version, DarwinVersion):
+            return darwin_version
+
+        instance = cls._instances.get(darwin_version)
+
+        if instance is None:
+            major, minor, patch = map(int, darwin_version.split("."))
+            canonical_version = "{}.{}.{}".format(major, minor, patch)
+            # Spellings such as "23.04.0" share the instance of their canonical form
+            instance = cls._instances.get(canonical_version)
+            if instance is None:
+                instance = str.__new__(cls, canonical_version)
+                object.__setattr__(instance, "parts", (major, minor, patch))
+                cls._instances[canonical_version] = instance
+            cls._instances[darwin_version] = instance
+
+        return instance
+
+    def __setattr__(self, name, value):
+        raise AttributeError("DarwinVersion is immutable")
+
+    def __reduce__(self):
+        return DarwinVersion, (str(self),)
+
+    @property
+    def major(self):
+        return self.parts[0]
+
+    # Equality and hashing follow the parsed parts like the ordering does, "23.04.0" equals "23.4.0"
+    def __eq__(self, other):
+        if not isinstance(other, str):
+            return NotImplemented
+
+        try:
+            return self.parts == DarwinVersion(other).parts
+        except ValueError:
+            return False
+
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+        return equal if equal is NotImplemented else not equal
+
+    def __hash__(self):
+        return hash(self.parts)
+
+    def __lt__(self, other):
+        return self.parts < DarwinVersion(other).parts
+
+    def __le__(self, other):
+        return self.parts <= DarwinVersion(other).parts
+
+    def __gt__(self, other):
+        return self.parts > DarwinVersion(other).parts
+
+    def __ge__(self, other):
+        return self.parts >= DarwinVersion(other).parts
+
+    def is_between(self, lowest_version, latest_version):
+        return DarwinVersion(lowest_version).parts <= self.parts <= DarwinVersion(latest_version).parts
+
 class macOSVersionInfo:
     def __init__(self, name, macos_version, release_status = "final"):
         self.name = name
@@ -17,10 +82,10 @@ macos_versions = [
 ]
 
 def get_latest_darwin_version():
-    return "{}.{}.{}".format(macos_versions[-1].darwin_version, 99, 99)
+    return DarwinVersion("{}.{}.{}".format(macos_versions[-1].darwin_version, 99, 99))
 
 def get_lowest_darwin_version():
-    return "{}.{}.{}".format(macos_versions[0].darwin_version, 0, 0)
+    return DarwinVersion("{}.{}.{}".format(macos_versions[0].darwin_version, 0, 0))
 
 def get_macos_name_by_darwin(darwin_version):
     for data in macos_versions:
@@ -1,3 +1,5 @@
+from Scripts import substring_matcher
+
 BluetoothIDs = [
     # BrcmPatchRAM Plugins
     "0489-E032",
@@ -951,6 +953,13 @@ NetworkIDs = [
     "F201-5370"
 ]
     
+# Ranges follow the kext comments in NetworkIDs, the first ID of each kext marks where its range starts
+NetworkFamilies = {
+    "broadcom_wifi": substring_matcher.SubstringMatcher(NetworkIDs[:NetworkIDs.index("8086-0060")]),
+    "intel_wifi": substring_matcher.SubstringMatcher(NetworkIDs[NetworkIDs.index("8086-0060"):NetworkIDs.index("8086-125B")]),
+    "ethernet": substring_matcher.SubstringMatcher(NetworkIDs[NetworkIDs.index("8086-125B"):NetworkIDs.index("0409-0408")])
+}
+
 RealtekCardReaderIDs = [
     # RealtekCardReader.kext
     "0BDA-0129",
@@ -0,0 +1,66 @@
+from Scripts import resource_fetcher
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlsplit
+import threading
+
+class DownloadScheduler:
+    def __init__(self, fetcher=None, max_workers=8, max_per_host=4):
+        self.fetcher = fetcher or resource_fetcher.ResourceFetcher()
+        self.max_workers = max_workers
+        self.max_per_host = max_per_host
+        self.host_semaphores = {}
+        self.lock = threading.Lock()
+
+    def get_host_semaphore(self, url):
+        host = urlsplit(url).hostname
+
+        with self.lock:
+            if host not in self.host_semaphores:
+                self.host_semaphores[host] = threading.BoundedSemaphore(self.max_per_host)
+            return self.host_semaphores[host]
+
+    def download(self, url, destination_path, expected_sha256=None, mirror_urls=(), cancel_event=None):
+        with self.get_host_semaphore(url):
+            sha256 = self.fetcher.download_and_save_file(url, destination_path, show_progress=False, expected_sha256=expected_sha256, mirror_urls=mirror_urls, cancel_event=cancel_event)
+        return destination_path, sha256
+
+    def download_all(self, jobs):
+        # Each job is a (name, url, destination_path, expected_sha256, mirror_urls) tuple. Downloads start right away,
+        # iterating the returned batch yields (name, destination_path, sha256) as each one finishes
+        return DownloadBatch(self, jobs)
+
+class DownloadBatch:
+    def __init__(self, scheduler, jobs):
+        self.cancel_event = threading.Event()
+        self.executor = None
+        self.futures = {}
+
+        if not jobs:
+            return
+
+        self.executor = ThreadPoolExecutor(max_workers=min(scheduler.max_workers, len(jobs)))
+        self.futures = {
+            self.executor.submit(scheduler.download, url, destination_path, expected_sha256, mirror_urls, self.cancel_event): name
+            for name, url, destination_path, expected_sha256, mirror_urls in jobs
+        }
+
+    def __iter__(self):
+        if self.executor is None:
+            return
+
+        finished = False
+        try:
+            for future in as_completed(self.futures):
+                destination_path, sha256 = future.result()
+                yield self.futures[future], destination_path, sha256
+            finished = True
+        finally:
+            if not finished:
+                self.cancel()
+            self.executor.shutdown(wait=finished)
+
+    def cancel(self):
+        # Queued downloads are dropped and running ones stop at their next read, nothing waits for them here
+        self.cancel_event.set()
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
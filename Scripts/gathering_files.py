@@ -1,50 +1,70 @@
+from Scripts.datasets import os_data
+from Scripts import artifact_store
+from Scripts import bundle_index
+from Scripts import cache_bundle
+from Scripts import download_scheduler
 from Scripts import github
+from Scripts import materializer
+from Scripts import product_manifest
 from Scripts import resource_fetcher
+from Scripts import stage_pipeline
 from Scripts import utils
 import os
 import tempfile
 import shutil
 import subprocess
+import threading
+import copy
 
 class gatheringFiles:
     def __init__(self):
         self.utils = utils.Utils()
         self.github = github.Github()
         self.fetcher = resource_fetcher.ResourceFetcher()
+        self.materializer = materializer.get_materializer()
+        self.download_scheduler = download_scheduler.DownloadScheduler(self.fetcher, max_workers=8, max_per_host=4)
         self.dortania_builds_url = "https://raw.githubusercontent.com/dortania/build-repo/builds/latest.json"
         self.ocbinarydata_url = "https://github.com/acidanthera/OcBinaryData/archive/refs/heads/master.zip"
         self.amd_vanilla_patches_url = "https://raw.githubusercontent.com/AMD-OSX/AMD_Vanilla/beta/patches.plist"
         self.temporary_dir = tempfile.mkdtemp()
         self.ock_files_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.realpath(__file__))), "OCK_Files")
+        self.partial_downloads_dir = os.path.join(self.ock_files_dir, ".downloads")
         self.bootloader_kexts_data_path = os.path.join(os.path.dirname(os.path.dirname(os.path.realpath(__file__))), "bootloader_kexts_data.json")
         self.download_history_file = os.path.join(self.ock_files_dir, "history.json")
+        self.amd_vanilla_patches_path = os.path.join(self.ock_files_dir, "AMD_Vanilla", "patches.plist")
+        self.offline = cache_bundle.CacheBundle().is_offline()
+        self.prefetch_lock = threading.Lock()
+        self.prefetch_request = None
+        self.prefetch_thread = None
+        self.prefetch_batch = None
+        self.prefetch_cancelled = threading.Event()
+        self.prefetch_error = None
+        self.pipeline_queue_size = 4
+        self.extract_workers = min(4, os.cpu_count() or 1)
+        self.pipeline_timings = []
+        self.artifact_store = artifact_store.ArtifactStore(os.path.join(self.ock_files_dir, ".store"))
+
+    def load_download_history(self):
+        return product_manifest.ProductManifest(self.download_history_file).load()
 
-    def get_product_index(self, product_list, target_product_name):
-        for index, product in enumerate(product_list):
-            if target_product_name == product.get("product_name"):
-                return index
-        return None
-        
     def get_bootloader_kexts_data(self, kexts):
-        download_urls = self.utils.read_file(self.bootloader_kexts_data_path)
-
-        if not isinstance(download_urls, list):
-            download_urls = []
+        download_urls = product_manifest.ProductManifest(self.bootloader_kexts_data_path).load().products
 
         dortania_builds_data = self.fetcher.fetch_and_parse_content(self.dortania_builds_url, "json")
         seen_repos = set()
+        release_repos = []
 
         def add_product_to_download_urls(products):
             if isinstance(products, dict):
                 products = [products]
 
             for product in products:
-                product_index = self.get_product_index(download_urls, product.get("product_name"))
+                existing_product = download_urls.get(product.get("product_name"))
 
-                if product_index is None:
-                    download_urls.append(product)
-                else:
-                    download_urls[product_index] = product
+                # Mirrors are configured by hand, keep them when the release info is refreshed
+                if existing_product and existing_product.get("mirrors") and not product.get("mirrors"):
+                    product = {**product, "mirrors": existing_product.get("mirrors")}
+                download_urls[product.get("product_name")] = product
 
         for kext in kexts:
             if not kext.checked:
@@ -59,33 +79,67 @@ class gatheringFiles:
                     add_product_to_download_urls({
                         "product_name": name,
                         "id": dortania_builds_data[name]["versions"][0]["release"]["id"], 
-                        "url": dortania_builds_data[name]["versions"][0]["links"]["release"]
+                        "url": dortania_builds_data[name]["versions"][0]["links"]["release"],
+                        "sha256": dortania_builds_data[name]["versions"][0].get("hashes", {}).get("release", {}).get("sha256")
                     })
                 else:
-                    if self.github.check_ratelimit():
-                        latest_release = self.github.get_latest_release(kext.github_repo.get("owner"), kext.github_repo.get("repo")) or {}
+                    release_repos.append((kext.github_repo.get("owner"), kext.github_repo.get("repo")))
 
-                        add_product_to_download_urls(latest_release.get("assets"))
+        # Repositories missing from the dortania builds are resolved together
+        for latest_release in self.github.get_latest_releases(release_repos).values():
+            add_product_to_download_urls((latest_release or {}).get("assets", []))
 
         add_product_to_download_urls({
             "product_name": "OpenCorePkg",
             "id": dortania_builds_data["OpenCorePkg"]["versions"][0]["release"]["id"], 
-            "url": dortania_builds_data["OpenCorePkg"]["versions"][0]["links"]["release"]
+            "url": dortania_builds_data["OpenCorePkg"]["versions"][0]["links"]["release"],
+            "sha256": dortania_builds_data["OpenCorePkg"]["versions"][0].get("hashes", {}).get("release", {}).get("sha256")
         })
 
-        sorted_download_urls = sorted(download_urls, key=lambda x:x["product_name"])
+        sorted_download_urls = sorted(download_urls.values(), key=lambda x:x["product_name"])
 
         self.utils.create_folder(self.ock_files_dir)
         self.utils.write_file(self.bootloader_kexts_data_path, sorted_download_urls)
     
         return sorted_download_urls
     
+    def is_product_up_to_date(self, product_name, product_info, history_info):
+        if not history_info or product_info.get("id") != history_info.get("id"):
+            return False
+
+        if not os.path.isdir(os.path.join(self.ock_files_dir, product_name)):
+            return False
+
+        recorded_sha256 = history_info.get("sha256")
+        if not recorded_sha256:
+            return True
+
+        if product_info.get("sha256") and product_info.get("sha256").lower() != recorded_sha256:
+            return False
+
+        return self.artifact_store.check_integrity(product_name, product_info.get("id"), recorded_sha256)
+
+    def get_extraction_filter(self, product_name):
+        if product_name == "OcBinaryData":
+            def member_filter(member_name):
+                parts = member_name.split("/")
+                return len(parts) > 2 and not any(part.startswith(".") for part in parts)
+        elif "OpenCore" in product_name:
+            def member_filter(member_name):
+                return member_name.startswith("X64/EFI/") or member_name == "Docs/Sample.plist" or "macserial" in member_name.split("/")[-1]
+        else:
+            def member_filter(member_name):
+                return ".kext/" in member_name.lower() and not "debug" in member_name.lower()
+
+        return member_filter
+
     def move_bootloader_kexts_to_product_directory(self, product_name):
         if not os.path.exists(self.temporary_dir):
             raise FileNotFoundError("The directory {} does not exist.".format(self.temporary_dir))
         
         if not "OpenCore" in product_name:
-            kext_paths = self.utils.find_matching_paths(os.path.join(self.temporary_dir, product_name), extension_filter=".kext")
+            # Plugins inside a kext move together with it, so matched bundles are not descended into
+            kext_paths = self.utils.find_matching_paths(os.path.join(self.temporary_dir, product_name), extension_filter=".kext", prune=lambda relative_path: relative_path.lower().endswith(".kext"))
             for kext_path, type in kext_paths:
                 source_kext_path = os.path.join(self.temporary_dir, product_name, kext_path)
                 destination_kext_path = os.path.join(self.ock_files_dir, product_name, os.path.basename(kext_path))
@@ -109,7 +163,7 @@ class gatheringFiles:
                     for name in os.listdir(ocbinarydata_dir):
                         if name.startswith("."):
                             continue
-                        shutil.copytree(os.path.join(ocbinarydata_dir, name), os.path.join(destination_efi_path, "OC", name), dirs_exist_ok=True)
+                        self.materializer.copy_tree(os.path.join(ocbinarydata_dir, name), os.path.join(destination_efi_path, "OC", name))
                     resources_image_dir = os.path.join(destination_efi_path, "OC", "Resources", "Image")
                     picker_variants = self.utils.find_matching_paths(resources_image_dir, type_filter="dir")
                     for picker_variant, type in picker_variants:
@@ -129,18 +183,9 @@ class gatheringFiles:
         
         return True
     
-    def gather_bootloader_kexts(self, kexts, macos_version):
-        download_history = self.utils.read_file(self.download_history_file)
-
-        if not isinstance(download_history, list):
-            download_history = []
-
-        bootloader_kext_urls = self.utils.read_file(self.bootloader_kexts_data_path)
-
-        if not isinstance(bootloader_kext_urls, list):
-            bootloader_kext_urls = self.get_bootloader_kexts_data(kexts)
-        
-        self.utils.create_folder(self.temporary_dir)
+    def get_products_to_download(self, kexts, macos_version, bootloader_kext_urls, download_history):
+        products_to_download = {}
+        bootloader_kext_urls = {product.get("product_name"): product for product in bootloader_kext_urls}
 
         for product in kexts + [{"Name": "OpenCorePkg"}]:
             if not isinstance(product, dict) and not product.checked:
@@ -150,11 +195,11 @@ class gatheringFiles:
             
             if product_name == "AirportItlwm":
                 version = macos_version[:2]
-                if self.utils.parse_darwin_version("24.0.0") <= self.utils.parse_darwin_version(macos_version):
+                if os_data.DarwinVersion("24.0.0") <= os_data.DarwinVersion(macos_version):
                     version = "22"
-                elif self.utils.parse_darwin_version("23.4.0") <= self.utils.parse_darwin_version(macos_version):
+                elif os_data.DarwinVersion("23.4.0") <= os_data.DarwinVersion(macos_version):
                     version = "23.4"
-                elif self.utils.parse_darwin_version("23.0.0") <= self.utils.parse_darwin_version(macos_version):
+                elif os_data.DarwinVersion("23.0.0") <= os_data.DarwinVersion(macos_version):
                     version = "23.0"
                 product_name += version
             elif "VoodooPS2" in product_name:
@@ -166,38 +211,192 @@ class gatheringFiles:
             elif product_name.startswith("VoodooI2C"):
                 product_name = "VoodooI2C"
             
-            try:
-                product_index = self.get_product_index(bootloader_kext_urls, product_name)
-                product_download_url = bootloader_kext_urls[product_index].get("url")
-                product_id = bootloader_kext_urls[product_index].get("id")
-            except:
+            product_info = bootloader_kext_urls.get(product_name)
+            if not product_info:
                 continue
-            
-            history_index = self.get_product_index(download_history, product_name)
-            if history_index is not None and product_id == download_history[history_index].get("id"):
+
+            if self.offline:
+                # An imported cache bundle is used as is, nothing is fetched for products it does not contain
+                if not product_name in download_history or not os.path.isdir(os.path.join(self.ock_files_dir, product_name)):
+                    print("{} is not included in the imported cache bundle, skipping it.".format(product_name))
                 continue
 
-            asset_dir = os.path.join(self.ock_files_dir, product_name)
-            self.utils.create_folder(asset_dir, remove_content=True)
+            if self.is_product_up_to_date(product_name, product_info, download_history.get(product_name)):
+                continue
 
-            zip_path = os.path.join(self.temporary_dir, product_name) + ".zip"
-            self.fetcher.download_and_save_file(product_download_url, zip_path)
-            self.utils.extract_zip_file(zip_path)
+            products_to_download[product_name] = product_info
 
-            if "OpenCore" in product_name:
-                ocbinarydata_dir = os.path.join(self.temporary_dir, "OcBinaryData")
-                if not os.path.exists(ocbinarydata_dir):
-                    zip_path = ocbinarydata_dir + ".zip"
-                    self.fetcher.download_and_save_file(self.ocbinarydata_url, zip_path)
-                    self.utils.extract_zip_file(zip_path)
+        return products_to_download
 
-            if self.move_bootloader_kexts_to_product_directory(product_name):
-                if history_index is None:
-                    download_history.append({"product_name": product_name, "id": product_id})
-                else:
-                    download_history[history_index]["id"] = product_id
-                
-                self.utils.write_file(self.download_history_file, download_history)
+    def start_prefetch(self, kexts, macos_version):
+        if self.offline:
+            return
+
+        with self.prefetch_lock:
+            # Only the latest selection matters, a newer request replaces one that has not started yet
+            self.prefetch_request = ([copy.copy(kext) for kext in kexts if kext.checked], macos_version)
+            self.prefetch_cancelled.clear()
+            if self.prefetch_thread is None:
+                self.prefetch_thread = threading.Thread(target=self.run_prefetch)
+                self.prefetch_thread.daemon = True
+                self.prefetch_thread.start()
+
+    def run_prefetch(self):
+        while True:
+            with self.prefetch_lock:
+                request = self.prefetch_request
+                self.prefetch_request = None
+                if request is None:
+                    self.prefetch_thread = None
+                    return
+
+            self.prefetch_error = None
+            try:
+                self.prefetch_archives(*request)
+            except Exception as e:
+                # The build downloads whatever the prefetch could not, the error is kept so it can say why
+                if not self.prefetch_cancelled.is_set():
+                    self.prefetch_error = e
+
+    def prefetch_archives(self, kexts, macos_version):
+        bootloader_kext_urls = self.get_bootloader_kexts_data(kexts)
+
+        download_history = self.load_download_history()
+
+        products_to_download = self.get_products_to_download(kexts, macos_version, bootloader_kext_urls, download_history)
+
+        self.utils.create_folder(self.partial_downloads_dir)
+
+        download_jobs = []
+
+        for product_name, product_info in products_to_download.items():
+            if not self.artifact_store.lookup(product_name, product_info.get("id"), product_info.get("sha256")):
+                download_jobs.append((product_name, product_info.get("url"), os.path.join(self.partial_downloads_dir, product_name) + ".zip", product_info.get("sha256"), product_info.get("mirrors", [])))
+
+        downloaded_archives = self.download_scheduler.download_all(download_jobs)
+        with self.prefetch_lock:
+            self.prefetch_batch = downloaded_archives
+            if self.prefetch_cancelled.is_set():
+                downloaded_archives.cancel()
+
+        # Archives only go into the artifact store, the build installs them from there
+        try:
+            for product_name, zip_path, sha256 in downloaded_archives:
+                self.artifact_store.add(product_name, products_to_download[product_name].get("id"), zip_path, sha256)
+        finally:
+            with self.prefetch_lock:
+                self.prefetch_batch = None
+
+    def cancel_prefetch(self):
+        # The prefetch is speculative, quitting must not wait for its downloads
+        with self.prefetch_lock:
+            self.prefetch_request = None
+            self.prefetch_cancelled.set()
+            if self.prefetch_batch is not None:
+                self.prefetch_batch.cancel()
+
+    def wait_for_prefetch(self):
+        prefetch_thread = self.prefetch_thread
+
+        if prefetch_thread is not None:
+            prefetch_thread.join()
+
+    def gather_bootloader_kexts(self, kexts, macos_version):
+        self.wait_for_prefetch()
+
+        if self.prefetch_error:
+            print("Background prefetch failed, downloading everything now: {}".format(self.prefetch_error))
+
+        download_history = self.load_download_history()
+
+        bootloader_kext_urls = self.utils.read_file(self.bootloader_kexts_data_path)
+
+        if not isinstance(bootloader_kext_urls, list):
+            bootloader_kext_urls = self.get_bootloader_kexts_data(kexts)
+        
+        self.utils.create_folder(self.temporary_dir)
+
+        products_to_download = self.get_products_to_download(kexts, macos_version, bootloader_kext_urls, download_history)
+
+        # Partial downloads are kept in OCK_Files, not the shared temporary directory, so an interrupted run can resume them
+        self.utils.create_folder(self.partial_downloads_dir)
+
+        # Versions already kept in the artifact store are installed without downloading them again
+        stored_archives = {}
+        download_jobs = []
+
+        for product_name, product_info in products_to_download.items():
+            archive_path = self.artifact_store.lookup(product_name, product_info.get("id"), product_info.get("sha256"))
+            if archive_path:
+                stored_archives[product_name] = (archive_path, os.path.basename(archive_path))
+            else:
+                download_jobs.append((product_name, product_info.get("url"), os.path.join(self.partial_downloads_dir, product_name) + ".zip", product_info.get("sha256"), product_info.get("mirrors", [])))
+
+        if any("OpenCore" in product_name for product_name in products_to_download):
+            download_jobs.append(("OcBinaryData", self.ocbinarydata_url, os.path.join(self.partial_downloads_dir, "OcBinaryData") + ".zip", None, []))
+
+        downloaded_archives = self.download_scheduler.download_all(download_jobs)
+
+        extracted_products = set()
+        installed_products = set()
+
+        archive_digests = {}
+
+        def get_archives():
+            for product_name, (archive_path, sha256) in stored_archives.items():
+                yield product_name, archive_path, sha256
+
+            for product_name, zip_path, sha256 in downloaded_archives:
+                if product_name in products_to_download:
+                    print("Downloaded {}".format(product_name))
+                    zip_path = self.artifact_store.add(product_name, products_to_download[product_name].get("id"), zip_path, sha256)
+                yield product_name, zip_path, sha256
+
+        def extract_archive(archive):
+            product_name, zip_path, sha256 = archive
+            self.utils.extract_zip_file(zip_path, os.path.join(self.temporary_dir, product_name), self.get_extraction_filter(product_name))
+            if product_name not in products_to_download:
+                os.remove(zip_path)
+            return product_name, sha256
+
+        def install_products(extracted_product):
+            product_name, sha256 = extracted_product
+            archive_digests[product_name] = sha256
+            extracted_products.add(product_name)
+
+            # OpenCorePkg is installed together with OcBinaryData, so it waits until both are extracted
+            for pending_product in sorted(extracted_products - installed_products):
+                if pending_product not in products_to_download:
+                    continue
+                if "OpenCore" in pending_product and not "OcBinaryData" in extracted_products:
+                    continue
+
+                installed_products.add(pending_product)
+                product_id = products_to_download[pending_product].get("id")
+
+                asset_dir = os.path.join(self.ock_files_dir, pending_product)
+                self.utils.create_folder(asset_dir, remove_content=True)
+
+                if self.move_bootloader_kexts_to_product_directory(pending_product):
+                    download_history.set(pending_product, id=product_id, sha256=archive_digests[pending_product])
+
+        # Downloads, extraction and installation run as separate stages connected by bounded queues
+        pipeline = stage_pipeline.StagePipeline(queue_size=self.pipeline_queue_size)
+        pipeline.add_stage("extract", extract_archive, workers=self.extract_workers)
+        pipeline.add_stage("install", install_products)
+
+        # Each installed product is journaled right away, history.json itself is rewritten once at the end
+        try:
+            pipeline.run(get_archives(), source_name="download")
+        finally:
+            # Ctrl-C or a failed stage must not leave queued downloads running until exit
+            downloaded_archives.cancel()
+            download_history.flush()
+            self.pipeline_timings = pipeline.get_timings()
+
+        self.artifact_store.collect_garbage((product_name, product.get("id")) for product_name, product in download_history.items())
+        # The bundle index is rebuilt here so building the EFI only has to read it
+        bundle_index.BundleIndex(self.ock_files_dir).load()
 
         shutil.rmtree(self.temporary_dir, ignore_errors=True)
     
@@ -209,7 +408,12 @@ class gatheringFiles:
         print("")
         
         try:
-            response = self.fetcher.fetch_and_parse_content(self.amd_vanilla_patches_url, "plist")
+            if self.offline:
+                response = self.utils.read_file(self.amd_vanilla_patches_path)
+            else:
+                response = self.fetcher.fetch_and_parse_content(self.amd_vanilla_patches_url, "plist")
+                self.utils.create_folder(os.path.dirname(self.amd_vanilla_patches_path))
+                self.utils.write_file(self.amd_vanilla_patches_path, response)
 
             return response["Kernel"]["Patch"]
         except: 
@@ -230,13 +434,13 @@ class gatheringFiles:
 
         hardware_sniffer_path = os.path.join(os.path.dirname(os.path.realpath(__file__)), "Hardware-Sniffer-CLI.exe")
 
+        if self.offline:
+            return hardware_sniffer_path if os.path.exists(hardware_sniffer_path) else None
+
         hardware_sniffer_cli = None
 
         try:            
-            download_history = self.utils.read_file(self.download_history_file)
-
-            if not isinstance(download_history, list):
-                download_history = []
+            download_history = self.load_download_history()
 
             latest_release = self.github.get_latest_release("lzhoang2801", "Hardware-Sniffer") or {}
 
@@ -244,23 +448,18 @@ class gatheringFiles:
                 if product.get("product_name") == "Hardware-Sniffer-CLI":
                     hardware_sniffer_cli = product
 
-            history_index = self.get_product_index(download_history, "Hardware-Sniffer-CLI")
-            if history_index is not None and hardware_sniffer_cli.get("id") == download_history[history_index].get("id"):
+            history_info = download_history.get("Hardware-Sniffer-CLI")
+            if history_info and hardware_sniffer_cli.get("id") == history_info.get("id"):
                 if os.path.exists(hardware_sniffer_path):
                     return hardware_sniffer_path
 
-            self.fetcher.download_and_save_file(hardware_sniffer_cli.get("url"), hardware_sniffer_path)
+            sha256 = self.fetcher.download_and_save_file(hardware_sniffer_cli.get("url"), hardware_sniffer_path, expected_sha256=hardware_sniffer_cli.get("sha256"))
 
             if not os.path.exists(hardware_sniffer_path):
                 return
             
-            if history_index is None:
-                download_history.append({"product_name": "Hardware-Sniffer-CLI", "id": hardware_sniffer_cli.get("id")})
-            else:
-                download_history[history_index]["id"] = hardware_sniffer_cli.get("id")
-            
-            self.utils.create_folder(os.path.dirname(self.download_history_file))
-            self.utils.write_file(self.download_history_file, download_history)
+            download_history.set("Hardware-Sniffer-CLI", id=hardware_sniffer_cli.get("id"), sha256=sha256)
+            download_history.flush()
 
             return hardware_sniffer_path
         except:
@@ -1,5 +1,21 @@
 from Scripts import resource_fetcher
 from Scripts import utils
+from urllib.error import HTTPError
+from urllib.parse import quote
+from concurrent.futures import ThreadPoolExecutor
+import json
+import time
+
+# GitHub counts the quota per client, so every Github instance shares what the responses report
+rate_limit = {
+    "remaining": None,
+    "reset": None
+}
+
+# Without a token every release is looked up on its own, this is only pointed out once per session
+notices = {
+    "graphql_fallback": False
+}
 
 class Github:
     def __init__(self):
@@ -10,19 +26,44 @@ class Github:
             "#Authorization": "token GITHUB_TOKEN",
             "X-GitHub-Api-Version": "2022-11-28",
         }
+        self.graphql_url = "https://api.github.com/graphql"
+        self.max_parallel_requests = 8
         self.fetcher = resource_fetcher.ResourceFetcher(self.headers)
+        self.fetcher.response_hook = self.update_ratelimit
+
+    def update_ratelimit(self, headers):
+        remaining = headers.get("X-RateLimit-Remaining")
+        reset = headers.get("X-RateLimit-Reset")
+
+        # GraphQL has a separate quota from the REST endpoints
+        if remaining is None or not remaining.isdigit() or headers.get("X-RateLimit-Resource", "core") != "core":
+            return
+
+        rate_limit["remaining"] = int(remaining)
+        rate_limit["reset"] = int(reset) if reset and reset.isdigit() else None
 
     def check_ratelimit(self):
-        url = "https://api.github.com/rate_limit"
+        if rate_limit["remaining"] is None or rate_limit["remaining"] > 0:
+            return True
+
+        return rate_limit["reset"] is not None and time.time() >= rate_limit["reset"]
 
-        response = self.fetcher.fetch_and_parse_content(url, "json")
+    def fetch_api(self, url):
+        # Once the quota runs out, answer from the last cached response instead of waiting for the reset
+        if not self.check_ratelimit():
+            return self.fetcher.fetch_cached_content(url, "json")
 
-        return response.get("rate").get("remaining") != 0
+        try:
+            return self.fetcher.fetch_and_parse_content(url, "json")
+        except HTTPError as e:
+            if e.code in (403, 429) and not self.check_ratelimit():
+                return self.fetcher.fetch_cached_content(url, "json")
+            raise
         
     def get_latest_commit(self, owner, repo):
         url = "https://api.github.com/repos/{}/{}/commits".format(owner, repo)
 
-        response = self.fetcher.fetch_and_parse_content(url, "json")
+        response = self.fetch_api(url)
 
         try:
             latest_commit = response[0].get("commit")
@@ -34,15 +75,30 @@ class Github:
 
         return {
             "message": latest_commit.get("message").split("\n")[0],
-            "sha": latest_commit.get("tree").get("sha")
+            "sha": latest_commit.get("tree").get("sha"),
+            "commit_sha": response[0].get("sha")
         }
         
+    def get_tree(self, owner, repo, tree_sha):
+        url = "https://api.github.com/repos/{}/{}/git/trees/{}?recursive=1".format(owner, repo, tree_sha)
+
+        response = self.fetch_api(url)
+
+        if not isinstance(response, dict) or response.get("truncated") or not isinstance(response.get("tree"), list):
+            return
+
+        return [entry for entry in response.get("tree") if entry.get("type") == "blob"]
+
+    def get_raw_url(self, owner, repo, commit_sha, path):
+        # raw.githubusercontent.com serves file contents without counting against the REST API quota
+        return "https://raw.githubusercontent.com/{}/{}/{}/{}".format(owner, repo, commit_sha, quote(path))
+
     def get_latest_artifact(self, owner, repo):
         results = []
 
         url = "https://api.github.com/repos/{}/{}/actions/artifacts".format(owner, repo)
 
-        response = self.fetcher.fetch_and_parse_content(url, "json")
+        response = self.fetch_api(url)
 
         latest_artifact_id = response.get("artifacts")[0].get("id")
         
@@ -57,28 +113,87 @@ class Github:
     def get_latest_release(self, owner, repo):
         url = "https://api.github.com/repos/{}/{}/releases".format(owner, repo)
 
-        response = self.fetcher.fetch_and_parse_content(url, "json")
+        response = self.fetch_api(url)
         
         try:
             latest_release = response[0]
         except:
             return
         
+        return self.parse_release(latest_release)
+
+    def get_latest_releases(self, repos):
+        repos = list(dict.fromkeys(repos))
+
+        if not repos:
+            return {}
+
+        # GraphQL resolves every repository in one round-trip but only works with a token
+        if "Authorization" in self.headers and self.check_ratelimit():
+            try:
+                return self.get_latest_releases_graphql(repos)
+            except Exception as e:
+                print("GraphQL release lookup failed, falling back to the REST API: {}".format(e))
+        elif not "Authorization" in self.headers and not notices["graphql_fallback"]:
+            notices["graphql_fallback"] = True
+            print("No GitHub token is set, looking up {} releases one by one through the REST API.".format(len(repos)))
+            print("Set the Authorization header in Scripts/github.py to fetch them in a single GraphQL request.")
+
+        with ThreadPoolExecutor(max_workers=min(self.max_parallel_requests, len(repos))) as executor:
+            latest_releases = executor.map(lambda owner_repo: self.get_latest_release(*owner_repo), repos)
+            return dict(zip(repos, latest_releases))
+
+    def get_latest_releases_graphql(self, repos):
+        release_fields = "releases(first: 1, orderBy: {field: CREATED_AT, direction: DESC}) { nodes { description releaseAssets(first: 100) { nodes { databaseId name downloadUrl } } } }"
+        query = "query {{ {} }}".format(" ".join(
+            "r{}: repository(owner: {}, name: {}) {{ {} }}".format(index, json.dumps(owner), json.dumps(repo), release_fields)
+            for index, (owner, repo) in enumerate(repos)
+        ))
+
+        response = self.fetcher.post_and_parse_content(self.graphql_url, {"query": query})
+        data = response.get("data") or {}
+
+        latest_releases = {}
+
+        for index, owner_repo in enumerate(repos):
+            releases = ((data.get("r{}".format(index)) or {}).get("releases") or {}).get("nodes") or []
+
+            if not releases:
+                latest_releases[owner_repo] = None
+                continue
+
+            latest_releases[owner_repo] = self.parse_release({
+                "body": releases[0].get("description"),
+                "assets": [
+                    {
+                        "id": asset.get("databaseId"),
+                        "name": asset.get("name"),
+                        "browser_download_url": asset.get("downloadUrl")
+                    }
+                    for asset in (releases[0].get("releaseAssets") or {}).get("nodes") or []
+                ]
+            })
+
+        return latest_releases
+
+    def parse_release(self, latest_release):
         if not isinstance(latest_release, dict):
             return
         
         assets = []
 
-        for asset in response[0].get("assets"):
+        for asset in latest_release.get("assets"):
             asset_id = asset.get("id")
             download_url = asset.get("browser_download_url")
             asset_name = self.extract_asset_name(asset.get("name"))
+            asset_digest = asset.get("digest") or ""
 
             if "tlwm" in download_url or ("tlwm" not in download_url and "DEBUG" not in download_url.upper()):
                 assets.append({
                     "product_name": asset_name, 
                     "id": asset_id, 
-                    "url": download_url
+                    "url": download_url,
+                    "sha256": asset_digest.split(":", 1)[-1] if asset_digest.startswith("sha256:") else None
                 })
 
         return {
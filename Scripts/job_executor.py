@@ -0,0 +1,46 @@
+from Scripts import run
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+import os
+
+class JobExecutor:
+    def __init__(self, max_workers=None):
+        self.r = run.Run()
+        self.max_workers = max_workers or os.cpu_count() or 1
+
+    def run(self, command_list, leave_on_fail=False):
+        # Takes the same command dicts as Run.run, but always returns a list of outputs in submission order.
+        # Each worker thread waits on its own child process, so the pool bounds how many processes run at once
+        if type(command_list) is dict:
+            command_list = [command_list]
+        if not command_list:
+            return []
+
+        executor = ThreadPoolExecutor(max_workers=min(self.max_workers, len(command_list)))
+        try:
+            futures = [executor.submit(self.r.run, comm) for comm in command_list]
+            pending = set(futures)
+
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                if leave_on_fail and any(self.get_returncode(future.result()) != 0 for future in done):
+                    # Jobs that have not started yet are dropped, running ones are left to finish
+                    for future in pending:
+                        future.cancel()
+                    break
+        finally:
+            executor.shutdown(wait=True)
+
+        output_list = []
+        for future in futures:
+            if future.cancelled():
+                break
+            output = future.result()
+            output_list.append(output)
+            if leave_on_fail and self.get_returncode(output) != 0:
+                # Same as Run.run, nothing after the first failed command is reported
+                break
+        return output_list
+
+    def get_returncode(self, output):
+        # Run.run returns an empty list for a command without args
+        return output[2] if isinstance(output, tuple) else 0
@@ -5,9 +5,10 @@ from Scripts.datasets import mac_model_data
 from Scripts.datasets import os_data
 from Scripts.datasets import pci_data
 from Scripts.datasets import codec_layouts
+from Scripts import bundle_index
+from Scripts import materializer
 from Scripts import utils
 import os
-import shutil
 
 try:
     long
@@ -19,6 +20,7 @@ except NameError:
 class KextMaestro:
     def __init__(self):
         self.utils = utils.Utils()
+        self.materializer = materializer.get_materializer()
         self.matching_keys = [
             "IOPCIMatch", 
             "IONameMatch", 
@@ -28,6 +30,8 @@ class KextMaestro:
             "HDAConfigDefault"
         ]
         self.ock_files_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.realpath(__file__))), "OCK_Files")
+        self.bundle_index = bundle_index.BundleIndex(self.ock_files_dir)
+        self.installed_kexts = {}
         self.kexts = kext_data.kexts
         
     def extract_pci_id(self, kext_path):
@@ -71,7 +75,7 @@ class KextMaestro:
         return pci_ids
 
     def is_intel_hedt_cpu(self, cpu_codename):
-        return not self.utils.contains_any(cpu_data.IntelCPUGenerations, cpu_codename, start=21) is None and cpu_codename.endswith(("-X", "-P", "-W", "-E", "-EP", "-EX"))
+        return not cpu_data.IntelCPUFamilies["cascade_lake_and_older"].find(cpu_codename) is None and cpu_codename.endswith(("-X", "-P", "-W", "-E", "-EP", "-EX"))
     
     def get_kext_index(self, name):
         for index, kext in enumerate(self.kexts):
@@ -82,7 +86,7 @@ class KextMaestro:
     def check_kext(self, index, target_darwin_version, allow_unsupported_kexts=False):
         kext = self.kexts[index]
 
-        if kext.checked or not (allow_unsupported_kexts or self.utils.parse_darwin_version(kext.min_darwin_version) <= self.utils.parse_darwin_version(target_darwin_version) <= self.utils.parse_darwin_version(kext.max_darwin_version)):
+        if kext.checked or not (allow_unsupported_kexts or os_data.DarwinVersion(target_darwin_version).is_between(kext.min_darwin_version, kext.max_darwin_version)):
             return
 
         kext.checked = True
@@ -113,22 +117,22 @@ class KextMaestro:
             selected_kexts.append("SMCLightSensor")
 
         if  not (" Core" in hardware_report.get("CPU").get("Processor Name") and \
-                 self.utils.contains_any(cpu_data.IntelCPUGenerations, hardware_report.get("CPU").get("Codename"), start=4)) or \
-            self.utils.parse_darwin_version(macos_version) >= self.utils.parse_darwin_version("23.0.0") or "MacPro7,1" in smbios_model:
+                 cpu_data.IntelCPUFamilies["ice_lake_and_older"].find(hardware_report.get("CPU").get("Codename"))) or \
+            os_data.DarwinVersion(macos_version) >= os_data.DarwinVersion("23.0.0") or "MacPro7,1" in smbios_model:
             selected_kexts.append("RestrictEvents")
 
         if hardware_report.get("Sound"):
             if list(hardware_report.get("Sound").items())[0][-1].get("Device ID") in codec_layouts.data:
                 selected_kexts.append("AppleALC")
         
-        if "AMD" in hardware_report.get("CPU").get("Manufacturer") and self.utils.parse_darwin_version(macos_version) >= self.utils.parse_darwin_version("21.4.0") or \
-            int(hardware_report.get("CPU").get("CPU Count")) > 1 and self.utils.parse_darwin_version(macos_version) >= self.utils.parse_darwin_version("19.0.0"):
+        if "AMD" in hardware_report.get("CPU").get("Manufacturer") and os_data.DarwinVersion(macos_version) >= os_data.DarwinVersion("21.4.0") or \
+            int(hardware_report.get("CPU").get("CPU Count")) > 1 and os_data.DarwinVersion(macos_version) >= os_data.DarwinVersion("19.0.0"):
             selected_kexts.append("AppleMCEReporterDisabler")
 
-        if self.utils.parse_darwin_version(macos_version) >= self.utils.parse_darwin_version("22.0.0") and not "AVX2" in hardware_report.get("CPU").get("SIMD Features"):
+        if os_data.DarwinVersion(macos_version) >= os_data.DarwinVersion("22.0.0") and not "AVX2" in hardware_report.get("CPU").get("SIMD Features"):
             selected_kexts.append("CryptexFixup")
 
-        if self.utils.contains_any(cpu_data.IntelCPUGenerations, hardware_report.get("CPU").get("Codename"), end=2) and \
+        if cpu_data.IntelCPUFamilies["alder_lake_and_newer"].find(hardware_report.get("CPU").get("Codename")) and \
             int(hardware_report.get("CPU").get("Core Count")) > 6:
             selected_kexts.append("CpuTopologyRebuild")
 
@@ -151,15 +155,15 @@ class KextMaestro:
         for network_name, network_props in hardware_report.get("Network", {}).items():
             device_id = network_props.get("Device ID")
 
-            if self.utils.contains_any(pci_data.NetworkIDs, device_id, end=21):
+            if pci_data.NetworkFamilies["broadcom_wifi"].find(device_id):
                 if device_id in ["14E4-43A0", "14E4-43A3", "14E4-43BA"]:
-                    if self.utils.parse_darwin_version(macos_version) >= self.utils.parse_darwin_version("23.0.0"):
+                    if os_data.DarwinVersion(macos_version) >= os_data.DarwinVersion("23.0.0"):
                         selected_kexts.extend(("AirportBrcmFixup", "IOSkywalkFamily"))
                 elif device_id in pci_data.NetworkIDs:
                     selected_kexts.append("AirportBrcmFixup")
-            elif self.utils.contains_any(pci_data.NetworkIDs, device_id, start=21, end=108):
-                selected_kexts.append("AirportItlwm" if self.utils.parse_darwin_version(macos_version) < self.utils.parse_darwin_version("23.0.0") else "itlwm")
-            elif self.utils.contains_any(pci_data.NetworkIDs, device_id, start=108, end=219):
+            elif pci_data.NetworkFamilies["intel_wifi"].find(device_id):
+                selected_kexts.append("AirportItlwm" if os_data.DarwinVersion(macos_version) < os_data.DarwinVersion("23.0.0") else "itlwm")
+            elif pci_data.NetworkFamilies["ethernet"].find(device_id):
                 ethernet_pci = pci_data.NetworkIDs.index(device_id)
                 if 107 < ethernet_pci < 115:
                     selected_kexts.append("AppleIGC")
@@ -251,20 +255,23 @@ class KextMaestro:
             self.check_kext(self.get_kext_index(name), macos_version, "Beta" in os_data.get_macos_name_by_darwin(macos_version))
 
     def install_kexts_to_efi(self, macos_version, kexts_directory):
+        bundle_index = self.bundle_index.load()
+        self.installed_kexts = {}
+
         for kext in self.kexts:
             if kext.checked:
                 try:
                     source_kext_path = destination_kext_path = None
 
-                    kext_paths = self.utils.find_matching_paths(self.ock_files_dir, extension_filter=".kext", name_filter=kext.name)
-                    for kext_path, type in kext_paths:
+                    for bundle in bundle_index.find_bundles(kext.name):
+                        kext_path = bundle.get("path")
                         if "AirportItlwm" == kext.name:
                             version = macos_version[:2]
-                            if self.utils.parse_darwin_version("24.0.0") <= self.utils.parse_darwin_version(macos_version):
+                            if os_data.DarwinVersion("24.0.0") <= os_data.DarwinVersion(macos_version):
                                 version = "22"
-                            elif self.utils.parse_darwin_version("23.4.0") <= self.utils.parse_darwin_version(macos_version):
+                            elif os_data.DarwinVersion("23.4.0") <= os_data.DarwinVersion(macos_version):
                                 version = "23.4"
-                            elif self.utils.parse_darwin_version("23.0.0") <= self.utils.parse_darwin_version(macos_version):
+                            elif os_data.DarwinVersion("23.0.0") <= os_data.DarwinVersion(macos_version):
                                 version = "23.0"
                             
                             if version in kext_path:
@@ -281,15 +288,25 @@ class KextMaestro:
                                     break
                     
                     if os.path.exists(source_kext_path):
-                        shutil.copytree(source_kext_path, destination_kext_path, dirs_exist_ok=True)
+                        self.materializer.copy_tree(source_kext_path, destination_kext_path)
+                        self.installed_kexts[os.path.basename(kext_path)] = kext_path
                 except:
                     continue
         
+    def get_installed_bundle(self, kext_path):
+        parts = kext_path.replace("\\", "/").split("/")
+        source_kext_path = self.installed_kexts.get(parts[0])
+
+        if not source_kext_path:
+            return None
+
+        return self.bundle_index.get("/".join([source_kext_path] + parts[1:]))
+
     def load_kexts(self, macos_version, kexts_directory):
         kernel_add = []
         unload_kext = []
 
-        if self.kexts[self.get_kext_index("AirportBrcmFixup")].checked and self.utils.parse_darwin_version(macos_version) > self.utils.parse_darwin_version("20.0.0"):
+        if self.kexts[self.get_kext_index("AirportBrcmFixup")].checked and os_data.DarwinVersion(macos_version) > os_data.DarwinVersion("20.0.0"):
             unload_kext.append("AirPortBrcm4360_Injector")
 
         if self.kexts[self.get_kext_index("VoodooSMBus")].checked:
@@ -310,20 +327,29 @@ class KextMaestro:
         bundle_list = []
 
         for kext_path, type in kext_paths:        
-            try:
-                plist_path = self.utils.find_matching_paths(os.path.join(kexts_directory, kext_path), extension_filter=".plist", name_filter="Info")[0][0]
-                bundle_info = self.utils.read_file(os.path.join(kexts_directory, kext_path, plist_path))
-            except:
-                bundle_info = {}
+            bundle = self.get_installed_bundle(kext_path)
+
+            if bundle:
+                # Installed kexts are copies of indexed bundles, their Info.plist is not parsed again
+                plist_path = bundle.get("plist_path")
+                bundle_info = bundle.get("info")
+                executable_path = bundle.get("executable_path")
+            else:
+                try:
+                    plist_path = next(self.utils.iterate_matching_paths(os.path.join(kexts_directory, kext_path), extension_filter=".plist", name_filter="Info", prune=lambda relative_path: relative_path.lower().endswith(".kext")))[0]
+                    bundle_info = self.utils.read_file(os.path.join(kexts_directory, kext_path, plist_path))
+                except:
+                    bundle_info = {}
+
+                executable_path = os.path.join("Contents", "MacOS", bundle_info.get("CFBundleExecutable", "None"))
+                if not os.path.exists(os.path.join(kexts_directory, kext_path, executable_path)):
+                    executable_path = ""
 
             if not isinstance(bundle_info.get("CFBundleIdentifier", None), (str, unicode)):
                 continue
 
-            executable_path = os.path.join("Contents", "MacOS", bundle_info.get("CFBundleExecutable", "None"))
-            if not os.path.exists(os.path.join(kexts_directory, kext_path, executable_path)):
-                executable_path = ""
-
-            if bundle_info.get("CFBundleExecutable", "None") == "AirportItlwm" and self.utils.parse_darwin_version("24.0.0") <= self.utils.parse_darwin_version(macos_version):
+            if bundle_info.get("CFBundleExecutable", "None") == "AirportItlwm" and os_data.DarwinVersion("24.0.0") <= os_data.DarwinVersion(macos_version):
+                bundle_info = self.utils.read_file(os.path.join(kexts_directory, kext_path, plist_path))
                 bundle_info["IOKitPersonalities"]["itlwm"]["IOPCIMatch"] += " 0x43A014E4"
                 self.utils.write_file(os.path.join(kexts_directory, kext_path, plist_path), bundle_info)
             
@@ -393,9 +419,7 @@ class KextMaestro:
         incompatible_kexts = [
             (self.kexts[index].name, "Lilu" in self.kexts[index].requires_kexts)
             for index in selected_kexts
-            if not self.utils.parse_darwin_version(self.kexts[index].min_darwin_version)
-            <= self.utils.parse_darwin_version(target_darwin_version)
-            <= self.utils.parse_darwin_version(self.kexts[index].max_darwin_version)
+            if not os_data.DarwinVersion(target_darwin_version).is_between(self.kexts[index].min_darwin_version, self.kexts[index].max_darwin_version)
         ]
 
         if not incompatible_kexts:
@@ -438,7 +462,7 @@ class KextMaestro:
                 line = "{} {:2}. {:25} - {:60}".format(checkbox, index, kext.name, kext.description)
                 if kext.checked:
                     line = "\033[1;32m{}\033[0m".format(line)
-                elif not self.utils.parse_darwin_version(kext.min_darwin_version) <= self.utils.parse_darwin_version(macos_version) <= self.utils.parse_darwin_version(kext.max_darwin_version):
+                elif not os_data.DarwinVersion(macos_version).is_between(kext.min_darwin_version, kext.max_darwin_version):
                     line = "\033[90m{}\033[0m".format(line)
                 contents.append(line)
             contents.append("\033[1;36m")
@@ -0,0 +1,89 @@
+import os
+import sys
+import shutil
+import threading
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+FICLONE = 0x40049409
+
+class Materializer:
+    def __init__(self, mutable_extensions=(".plist",)):
+        # Files that are edited in place after materializing must never share an inode with the source
+        self.mutable_extensions = mutable_extensions
+        self.unsupported_methods = set()
+        self.counts = {"reflink": 0, "hardlink": 0, "copy": 0}
+
+    def reflink(self, source_path, destination_path):
+        if fcntl is None or not sys.platform.startswith("linux"):
+            raise OSError("Reflinks are not supported on this platform")
+
+        with open(source_path, "rb") as source, open(destination_path, "wb") as destination:
+            try:
+                fcntl.ioctl(destination.fileno(), FICLONE, source.fileno())
+            except OSError:
+                destination.close()
+                os.remove(destination_path)
+                raise
+        shutil.copystat(source_path, destination_path)
+
+    def hardlink(self, source_path, destination_path):
+        if os.path.splitext(source_path)[1].lower() in self.mutable_extensions:
+            raise OSError("{} is edited after materializing".format(source_path))
+
+        os.link(source_path, destination_path)
+
+    def copy_file(self, source_path, destination_path):
+        # The destination is unlinked first, writing through an existing hardlink would change the source too
+        if os.path.lexists(destination_path):
+            os.remove(destination_path)
+
+        device_pair = (os.stat(source_path).st_dev, os.stat(os.path.dirname(destination_path)).st_dev)
+
+        for method_name in ("reflink", "hardlink"):
+            if (method_name, device_pair) in self.unsupported_methods:
+                continue
+
+            try:
+                getattr(self, method_name)(source_path, destination_path)
+                self.counts[method_name] += 1
+                return destination_path
+            except OSError:
+                if method_name == "reflink" or device_pair[0] != device_pair[1]:
+                    self.unsupported_methods.add((method_name, device_pair))
+
+        shutil.copy2(source_path, destination_path)
+        self.counts["copy"] += 1
+        return destination_path
+
+    def copy_tree(self, source_dir, destination_dir, path_filter=None):
+        # path_filter receives the "/" separated path relative to source_dir and the source path,
+        # directories it rejects are not walked at all
+        for root, dirs, files in os.walk(source_dir):
+            relative_dir = os.path.relpath(root, source_dir)
+            target_dir = os.path.join(destination_dir, relative_dir)
+            relative_prefix = "" if relative_dir == os.curdir else relative_dir.replace(os.sep, "/") + "/"
+
+            if path_filter:
+                dirs[:] = [name for name in dirs if path_filter(relative_prefix + name, os.path.join(root, name))]
+                files = [name for name in files if path_filter(relative_prefix + name, os.path.join(root, name))]
+
+            os.makedirs(target_dir, exist_ok=True)
+            for name in files:
+                self.copy_file(os.path.join(root, name), os.path.join(target_dir, name))
+
+        return destination_dir
+
+_materializer = None
+_materializer_lock = threading.Lock()
+
+def get_materializer():
+    global _materializer
+
+    with _materializer_lock:
+        if _materializer is None:
+            _materializer = Materializer()
+        return _materializer
@@ -0,0 +1,83 @@
+from Scripts import utils
+import os
+import json
+
+class ProductManifest:
+    def __init__(self, file_path):
+        self.utils = utils.Utils()
+        self.file_path = file_path
+        self.journal_path = os.path.splitext(file_path)[0] + ".journal"
+        self.temporary_path = os.path.splitext(file_path)[0] + ".tmp.json"
+        self.products = {}
+
+    def load(self):
+        data = self.utils.read_file(self.file_path)
+
+        # Older versions wrote a list of products, newer ones keep the same shape on disk
+        if isinstance(data, dict):
+            data = list(data.values())
+        elif not isinstance(data, list):
+            data = []
+
+        self.products = {}
+        for product in data:
+            if isinstance(product, dict) and product.get("product_name"):
+                self.products[product.get("product_name")] = product
+
+        self.replay_journal()
+        return self
+
+    def replay_journal(self):
+        if not os.path.exists(self.journal_path):
+            return
+
+        with open(self.journal_path, "r") as journal:
+            for line in journal:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # A write interrupted halfway leaves a partial last line
+                    break
+
+                if entry.get("removed"):
+                    self.products.pop(entry.get("product_name"), None)
+                else:
+                    self.products[entry.get("product_name")] = entry
+
+        # Recovered entries are compacted right away so new ones never follow a partial line
+        self.flush()
+
+    def append_journal(self, entry):
+        self.utils.create_folder(os.path.dirname(self.file_path))
+        with open(self.journal_path, "a") as journal:
+            journal.write(json.dumps(entry) + "\n")
+            journal.flush()
+
+    def get(self, product_name):
+        return self.products.get(product_name)
+
+    def __contains__(self, product_name):
+        return product_name in self.products
+
+    def items(self):
+        return self.products.items()
+
+    def set(self, product_name, **fields):
+        product = {**self.products.get(product_name, {}), "product_name": product_name, **fields}
+        self.products[product_name] = product
+        self.append_journal(product)
+        return product
+
+    def remove(self, product_name):
+        if self.products.pop(product_name, None) is not None:
+            self.append_journal({"product_name": product_name, "removed": True})
+
+    def flush(self):
+        if not os.path.exists(self.journal_path) and os.path.exists(self.file_path):
+            return
+
+        self.utils.create_folder(os.path.dirname(self.file_path))
+        self.utils.write_file(self.temporary_path, list(self.products.values()))
+        os.replace(self.temporary_path, self.file_path)
+        if os.path.exists(self.journal_path):
+            os.remove(self.journal_path)
@@ -1,57 +1,593 @@
-import sys
 import ssl
 import os
+import socket
 import plistlib
 import json
+import threading
+import hashlib
+import time
+import queue
+import collections
+import base64
+import http.client
+import urllib.request
+from urllib.error import HTTPError
+from urllib.parse import urlsplit, urljoin, unquote
 
-if sys.version_info >= (3, 0):
-    from urllib.request import urlopen, Request
-else:
-    import urllib2
-    from urllib2 import urlopen, Request
+def create_ssl_context():
+    try:
+        cafile = ssl.get_default_verify_paths().openssl_cafile
+        if not os.path.exists(cafile):
+            import certifi
+            cafile = certifi.where()
+        ssl_context = ssl.create_default_context(cafile=cafile)
+    except Exception as e:
+        print("SSL Context Creation Error: {}".format(e))
+        ssl_context = ssl._create_unverified_context()
+    return ssl_context
+
+class PooledResponse:
+    def __init__(self, session, host_key, connection, response, url, reusable=True):
+        self.session = session
+        self.reusable = reusable
+        self.host_key = host_key
+        self.connection = connection
+        self.response = response
+        self.url = url
+        self.status = response.status
+        self.reason = response.reason
+        self.headers = response.headers
+        self.length = response.length
+
+    def read(self, amt=None):
+        return self.response.read(amt)
+
+    def readinto(self, buffer):
+        return self.response.readinto(buffer)
+
+    def getheader(self, name, default=None):
+        return self.response.getheader(name, default)
+
+    def close(self):
+        if self.connection is None:
+            return
+
+        # A connection can only serve the next request once this response has been drained
+        if self.reusable and self.response.isclosed() and not self.response.will_close:
+            self.session.release_connection(self.host_key, self.connection)
+        else:
+            self.response.close()
+            self.connection.close()
+        self.connection = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+class PooledSession:
+    def __init__(self, max_idle_per_host=8, timeout=60, max_redirects=10):
+        self.ssl_context = create_ssl_context()
+        self.max_idle_per_host = max_idle_per_host
+        self.timeout = timeout
+        self.max_redirects = max_redirects
+        self.idle_connections = {}
+        self.lock = threading.Lock()
+        # Same sources urlopen used, the *_PROXY environment variables first and the OS settings otherwise
+        self.proxies = urllib.request.getproxies()
+        self.proxy_bypass = {}
+
+    def get_proxy(self, scheme, host):
+        proxy = self.proxies.get(scheme)
+        if not proxy:
+            return None
+
+        with self.lock:
+            bypass = self.proxy_bypass.get(host)
+        if bypass is None:
+            bypass = bool(urllib.request.proxy_bypass(host))
+            with self.lock:
+                self.proxy_bypass[host] = bypass
+
+        if bypass:
+            return None
+        return proxy if "://" in proxy else "http://" + proxy
+
+    def get_proxy_headers(self, proxy_parts):
+        if proxy_parts.username is None:
+            return {}
+
+        credentials = "{}:{}".format(unquote(proxy_parts.username), unquote(proxy_parts.password or ""))
+        return {"Proxy-Authorization": "Basic " + base64.b64encode(credentials.encode("utf-8")).decode("ascii")}
+
+    def get_connection(self, host_key):
+        with self.lock:
+            idle = self.idle_connections.get(host_key)
+            if idle:
+                return idle.pop(), True
+
+        scheme, host, port, proxy = host_key
+        if proxy:
+            # https goes through a CONNECT tunnel, plain http is sent to the proxy with the full URL
+            proxy_parts = urlsplit(proxy)
+            proxy_host, proxy_port = proxy_parts.hostname, proxy_parts.port or 8080
+            if scheme == "https":
+                connection = http.client.HTTPSConnection(proxy_host, proxy_port, timeout=self.timeout, context=self.ssl_context)
+                connection.set_tunnel(host, port, headers=self.get_proxy_headers(proxy_parts))
+            else:
+                connection = http.client.HTTPConnection(proxy_host, proxy_port, timeout=self.timeout)
+        elif scheme == "https":
+            connection = http.client.HTTPSConnection(host, port, timeout=self.timeout, context=self.ssl_context)
+        else:
+            connection = http.client.HTTPConnection(host, port, timeout=self.timeout)
+        return connection, False
+
+    def release_connection(self, host_key, connection):
+        with self.lock:
+            idle = self.idle_connections.setdefault(host_key, [])
+            if len(idle) < self.max_idle_per_host:
+                idle.append(connection)
+                return
+        connection.close()
+
+    def close(self):
+        with self.lock:
+            idle_connections, self.idle_connections = self.idle_connections, {}
+
+        for connections in idle_connections.values():
+            for connection in connections:
+                connection.close()
+
+    def abort_connection(self, connection):
+        # Shutting the socket down wakes a thread blocked reading from it, closing it alone does not
+        sock = connection.sock
+        if sock is not None:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    def send(self, method, url, headers, body=None, on_connection=None):
+        parts = urlsplit(url)
+        scheme = parts.scheme.lower()
+        if scheme not in ("http", "https"):
+            raise ValueError("Unsupported URL scheme: {}".format(url))
+
+        proxy = self.get_proxy(scheme, parts.hostname)
+        host_key = (scheme, parts.hostname, parts.port or (443 if scheme == "https" else 80), proxy)
+        path = parts.path or "/"
+        if parts.query:
+            path += "?" + parts.query
+
+        request_headers = {"User-Agent": "OpCore-Simplify", "Connection": "keep-alive"}
+        if proxy and scheme == "http":
+            path = "{}://{}{}".format(scheme, parts.netloc, path)
+            request_headers.update(self.get_proxy_headers(urlsplit(proxy)))
+        request_headers.update(headers)
+
+        while True:
+            connection, reused = self.get_connection(host_key)
+            try:
+                if on_connection:
+                    if connection.sock is None:
+                        connection.connect()
+                    on_connection(connection)
+                connection.request(method, path, body=body, headers=request_headers)
+                response = connection.getresponse()
+            except (http.client.RemoteDisconnected, http.client.BadStatusLine, ConnectionResetError, BrokenPipeError):
+                connection.close()
+                # The server dropped an idle keep-alive connection, open a fresh one
+                if reused:
+                    continue
+                raise
+            except:
+                connection.close()
+                raise
+            return host_key, connection, response
+
+    def open(self, url, headers=None, method="GET", body=None, on_connection=None):
+        # on_connection receives every connected socket before its request is sent, so another thread can abort it.
+        # Such a connection is never handed back to the idle pool, an abort could otherwise hit whoever reuses it
+        for _ in range(self.max_redirects + 1):
+            host_key, connection, response = self.send(method, url, headers or {}, body, on_connection)
+            pooled_response = PooledResponse(self, host_key, connection, response, url, reusable=on_connection is None)
+
+            if response.status in (301, 302, 303, 307, 308) and response.getheader("Location"):
+                response.read()
+                pooled_response.close()
+                url = urljoin(url, response.getheader("Location"))
+                if response.status == 303:
+                    method = "GET"
+                    body = None
+                continue
+
+            if response.status >= 400:
+                response.read()
+                pooled_response.close()
+                raise HTTPError(url, response.status, response.reason, response.headers, None)
+
+            return pooled_response
+
+        raise HTTPError(url, response.status, "Too many redirects", response.headers, None)
+
+_session = None
+_session_lock = threading.Lock()
+
+def get_session():
+    global _session
+
+    with _session_lock:
+        if _session is None:
+            _session = PooledSession()
+        return _session
+
+class MetadataCache:
+    def __init__(self, cache_dir, ttl=600):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+
+    def get_entry_paths(self, url):
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, key + ".json"), os.path.join(self.cache_dir, key + ".body")
+
+    def load(self, url):
+        metadata_path, body_path = self.get_entry_paths(url)
+
+        try:
+            with open(metadata_path, "r") as metadata_file:
+                metadata = json.load(metadata_file)
+            with open(body_path, "rb") as body_file:
+                body = body_file.read()
+        except (OSError, ValueError):
+            return None, None
+
+        if not isinstance(metadata, dict) or metadata.get("url") != url:
+            return None, None
+
+        return metadata, body
+
+    def is_fresh(self, metadata):
+        return self.ttl > 0 and 0 <= time.time() - metadata.get("fetched_at", 0) < self.ttl
+
+    def write_metadata(self, url, metadata):
+        metadata_path, body_path = self.get_entry_paths(url)
+        temporary_path = "{}.{}.tmp".format(metadata_path, threading.get_ident())
+
+        with open(temporary_path, "w") as metadata_file:
+            json.dump(metadata, metadata_file)
+        os.replace(temporary_path, metadata_path)
+
+    def store(self, url, body, headers):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        metadata_path, body_path = self.get_entry_paths(url)
+        temporary_path = "{}.{}.tmp".format(body_path, threading.get_ident())
+
+        with open(temporary_path, "wb") as body_file:
+            body_file.write(body)
+        os.replace(temporary_path, body_path)
+
+        self.write_metadata(url, {
+            "url": url,
+            "etag": headers.get("ETag"),
+            "last_modified": headers.get("Last-Modified"),
+            "fetched_at": time.time()
+        })
+
+    def refresh(self, url, metadata):
+        metadata["fetched_at"] = time.time()
+        self.write_metadata(url, metadata)
+
+_metadata_cache = None
+
+def get_metadata_cache():
+    global _metadata_cache
+
+    with _session_lock:
+        if _metadata_cache is None:
+            _metadata_cache = MetadataCache(os.path.join(os.path.dirname(os.path.dirname(os.path.realpath(__file__))), "OCK_Files", ".cache"))
+        return _metadata_cache
+
+class DownloadProgress:
+    def __init__(self, total_size, min_interval=0.1):
+        self.total_size = total_size
+        self.min_interval = min_interval
+        self.last_update = 0
+
+    def update(self, bytes_downloaded, force=False):
+        if not self.total_size:
+            return
+
+        now = time.monotonic()
+        if not force and now - self.last_update < self.min_interval:
+            return
+        self.last_update = now
+
+        print("Downloaded {:.2f} MB of {:.2f} MB".format(bytes_downloaded / (1024 * 1024), self.total_size / (1024 * 1024)), end='\r')
 
 class ResourceFetcher:
     def __init__(self, headers=None):
         self.request_headers = headers
         self.buffer_size = 16 * 1024
-        self.ssl_context = self.create_ssl_context()
+        self.max_buffer_size = 1024 * 1024
+        self.chunk_target_time = 0.05
+        self.max_retries = 3
+        self.default_hedge_delay = 1.0
+        self.min_hedge_delay = 0.25
+        self.hedge_percentile = 0.95
+        self.first_byte_latencies = collections.deque(maxlen=50)
+        self.response_hook = None
+        self.session = get_session()
+        self.ssl_context = self.session.ssl_context
+        self.cache = get_metadata_cache()
 
-    def create_ssl_context(self):
+    def open(self, resource_url, headers, method="GET", body=None):
         try:
-            cafile = ssl.get_default_verify_paths().openssl_cafile
-            if not os.path.exists(cafile):
-                import certifi
-                cafile = certifi.where()
-            ssl_context = ssl.create_default_context(cafile=cafile)
-        except Exception as e:
-            print("SSL Context Creation Error: {}".format(e))
-            ssl_context = ssl._create_unverified_context()
-        return ssl_context
+            response = self.session.open(resource_url, headers, method, body)
+        except HTTPError as e:
+            if self.response_hook:
+                self.response_hook(e.headers)
+            raise
+
+        if self.response_hook:
+            self.response_hook(response.headers)
+        return response
+
+    def fetch_content(self, resource_url):
+        metadata, content = self.cache.load(resource_url)
+        if metadata and self.cache.is_fresh(metadata):
+            return content
+
+        headers = dict(self.request_headers or {})
+        if metadata and metadata.get("etag"):
+            headers["If-None-Match"] = metadata.get("etag")
+        if metadata and metadata.get("last_modified"):
+            headers["If-Modified-Since"] = metadata.get("last_modified")
+
+        with self.open(resource_url, headers) as response:
+            if response.status == 304 and metadata:
+                response.read()
+                self.cache.refresh(resource_url, metadata)
+                return content
 
-    def fetch_and_parse_content(self, resource_url, content_type=None):
-        request = Request(resource_url, headers=self.request_headers or {})
-        with urlopen(request, context=self.ssl_context) as response:
             content = response.read()
-            if content_type == 'json':
-                return json.loads(content)
-            elif content_type == 'plist':
-                return plistlib.loads(content)
-            else:
-                return content.decode('utf-8')
+            if response.status == 200:
+                self.cache.store(resource_url, content, response.headers)
+
+        return content
+
+    def post_and_parse_content(self, resource_url, payload, content_type='json'):
+        headers = dict(self.request_headers or {})
+        headers["Content-Type"] = "application/json"
+
+        with self.open(resource_url, headers, "POST", json.dumps(payload).encode("utf-8")) as response:
+            return self.parse_content(response.read(), content_type)
+
+    def fetch_cached_content(self, resource_url, content_type=None):
+        # Serves the last cached copy regardless of its age, without touching the network
+        metadata, content = self.cache.load(resource_url)
+        if metadata is None:
+            return None
+        return self.parse_content(content, content_type)
+
+    def fetch_and_parse_content(self, resource_url, content_type=None):
+        return self.parse_content(self.fetch_content(resource_url), content_type)
+
+    def parse_content(self, content, content_type=None):
+        if content_type == 'json':
+            return json.loads(content)
+        elif content_type == 'plist':
+            return plistlib.loads(content)
+        else:
+            return content.decode('utf-8')
+
+    def get_hedge_delay(self):
+        latencies = sorted(self.first_byte_latencies)
+
+        if len(latencies) < 5:
+            return self.default_hedge_delay
+
+        return max(self.min_hedge_delay, latencies[min(int(len(latencies) * self.hedge_percentile), len(latencies) - 1)])
+
+    def open_with_mirrors(self, resource_urls, headers):
+        if len(resource_urls) == 1:
+            return self.session.open(resource_urls[0], headers)
+
+        results = queue.Queue()
+        lock = threading.Lock()
+        state = {"cancelled": False}
+        active_connections = {}
+
+        def track_connection(resource_url, connection):
+            with lock:
+                if state["cancelled"]:
+                    raise IOError("Request to {} lost to a faster mirror".format(resource_url))
+                active_connections[resource_url] = connection
+
+        def open_url(resource_url):
+            start_time = time.monotonic()
+            try:
+                response = self.session.open(resource_url, headers, on_connection=lambda connection: track_connection(resource_url, connection))
+            except Exception as e:
+                results.put((resource_url, None, e))
+                return
+            finally:
+                # Only requests still waiting on their mirror are aborted, this one has its answer
+                with lock:
+                    active_connections.pop(resource_url, None)
+
+            with lock:
+                # A request that loses the race is closed as soon as it answers
+                if state["cancelled"]:
+                    response.close()
+                    return
+                self.first_byte_latencies.append(time.monotonic() - start_time)
+                results.put((resource_url, response, None))
+
+        def start_next_request():
+            thread = threading.Thread(target=open_url, args=(resource_urls[len(started_urls)],))
+            thread.daemon = True
+            started_urls.append(resource_urls[len(started_urls)])
+            thread.start()
 
-    def download_and_save_file(self, resource_url, destination_path):
-        request = Request(resource_url, headers=self.request_headers or {})
-        with urlopen(request, context=self.ssl_context) as response:
-            total_size = response.length
-            bytes_downloaded = 0
+        started_urls = []
+        pending_requests = 0
+        last_error = None
+
+        start_next_request()
+        pending_requests += 1
+
+        while pending_requests:
+            # Fire a hedged request at the next mirror when the current ones are slower than usual
+            timeout = self.get_hedge_delay() if len(started_urls) < len(resource_urls) else None
+            try:
+                resource_url, response, error = results.get(timeout=timeout)
+            except queue.Empty:
+                start_next_request()
+                pending_requests += 1
+                continue
+
+            pending_requests -= 1
+
+            if response is not None:
+                with lock:
+                    state["cancelled"] = True
+                    # Requests still waiting on their mirror are aborted now instead of holding a socket until the timeout
+                    for other_url, connection in active_connections.items():
+                        if other_url != resource_url:
+                            self.session.abort_connection(connection)
+                while not results.empty():
+                    other_url, other_response, other_error = results.get_nowait()
+                    if other_response is not None:
+                        other_response.close()
+                return response
+
+            last_error = error
+            if not pending_requests and len(started_urls) < len(resource_urls):
+                start_next_request()
+                pending_requests += 1
+
+        raise last_error
+
+    def read_partial_download(self, resource_url, part_path, metadata_path):
+        try:
+            with open(metadata_path, "r") as metadata_file:
+                metadata = json.load(metadata_file)
+        except (OSError, ValueError):
+            metadata = None
+
+        if not isinstance(metadata, dict) or metadata.get("url") != resource_url or not os.path.exists(part_path):
+            for path in (part_path, metadata_path):
+                if os.path.exists(path):
+                    os.remove(path)
+            return None
+
+        return metadata
+
+    def check_cancelled(self, resource_url, cancel_event):
+        if cancel_event is not None and cancel_event.is_set():
+            raise IOError("Download from {} was cancelled".format(resource_url))
+
+    def download_and_save_file(self, resource_url, destination_path, show_progress=True, expected_sha256=None, mirror_urls=(), cancel_event=None):
+        part_path = destination_path + ".part"
+        metadata_path = part_path + ".json"
+
+        if show_progress:
             print("Download from {}".format(resource_url))
 
-            with open(destination_path, 'wb') as file_writer:
-                while True:
-                    chunk = response.read(self.buffer_size)
-                    if not chunk:
-                        break
-                    file_writer.write(chunk)
-                    bytes_downloaded += len(chunk)
-                    if total_size:
-                        print("Downloaded {:.2f} MB of {:.2f} MB".format(bytes_downloaded / (1024 * 1024), total_size / (1024 * 1024)), end='\r')
+        buffer = memoryview(bytearray(self.max_buffer_size))
+        chunk_size = self.buffer_size
+
+        for attempt in range(self.max_retries + 1):
+            self.check_cancelled(resource_url, cancel_event)
+            metadata = self.read_partial_download(resource_url, part_path, metadata_path)
+            bytes_downloaded = os.path.getsize(part_path) if metadata else 0
+
+            headers = dict(self.request_headers or {})
+            if bytes_downloaded:
+                headers["Range"] = "bytes={}-".format(bytes_downloaded)
+                # Only accept a partial response if the remote file is still the one we started with
+                validator = metadata.get("etag") if not str(metadata.get("etag")).startswith("W/") else None
+                validator = validator or metadata.get("last_modified")
+                if validator:
+                    headers["If-Range"] = validator
+
+            try:
+                with self.open_with_mirrors([resource_url] + list(mirror_urls), headers) as response:
+                    content_range = response.getheader("Content-Range", "")
+                    if response.status == 206 and content_range.startswith("bytes {}-".format(bytes_downloaded)):
+                        total_size = content_range.split("/")[-1]
+                        total_size = int(total_size) if total_size.isdigit() else None
+                        file_mode = "ab"
+                    else:
+                        total_size = response.length
+                        bytes_downloaded = 0
+                        file_mode = "wb"
+
+                    # The digest is computed while streaming, only a resumed prefix has to be read back
+                    hasher = hashlib.sha256()
+                    if file_mode == "ab":
+                        with open(part_path, "rb") as file_reader:
+                            for chunk in iter(lambda: file_reader.read(1024 * 1024), b""):
+                                hasher.update(chunk)
+                    else:
+                        with open(metadata_path, "w") as metadata_file:
+                            json.dump({
+                                "url": resource_url,
+                                "etag": response.getheader("ETag"),
+                                "last_modified": response.getheader("Last-Modified"),
+                                "total_size": total_size
+                            }, metadata_file)
+
+                    progress = DownloadProgress(total_size if show_progress else None)
+
+                    with open(part_path, file_mode) as file_writer:
+                        while True:
+                            # The partial file is kept, a cancelled download resumes on the next run
+                            self.check_cancelled(resource_url, cancel_event)
+                            read_start = time.monotonic()
+                            size = response.readinto(buffer[:chunk_size])
+                            if not size:
+                                break
+                            read_time = time.monotonic() - read_start
+
+                            file_writer.write(buffer[:size])
+                            hasher.update(buffer[:size])
+                            bytes_downloaded += size
+                            progress.update(bytes_downloaded)
+
+                            # Grow the chunk while full chunks keep arriving faster than the target time, shrink it on slow links
+                            if size == chunk_size and read_time < self.chunk_target_time / 2:
+                                chunk_size = min(chunk_size * 2, self.max_buffer_size)
+                            elif read_time > self.chunk_target_time * 2:
+                                chunk_size = max(chunk_size // 2, self.buffer_size)
+
+                    progress.update(bytes_downloaded, force=True)
+            except HTTPError as e:
+                if e.code != 416:
+                    raise
+                # The partial file no longer matches the remote file, start over
+                if os.path.exists(part_path):
+                    os.remove(part_path)
+                if attempt == self.max_retries:
+                    raise
+                continue
+            except (http.client.HTTPException, OSError):
+                if attempt == self.max_retries or cancel_event is not None and cancel_event.is_set():
+                    raise
+                continue
+
+            if total_size is not None and bytes_downloaded != total_size:
+                if attempt == self.max_retries:
+                    raise IOError("Incomplete download from {}: received {} of {} bytes".format(resource_url, bytes_downloaded, total_size))
+                continue
+
+            sha256 = hasher.hexdigest()
+            if expected_sha256 and sha256 != expected_sha256.lower():
+                os.remove(part_path)
+                os.remove(metadata_path)
+                raise IOError("Checksum mismatch for {}: expected {}, got {}".format(resource_url, expected_sha256.lower(), sha256))
+
+            os.replace(part_path, destination_path)
+            os.remove(metadata_path)
+            return sha256
@@ -1,88 +1,133 @@
 # Source: https://github.com/corpnewt/SSDTTime/blob/7b3fb78112bf320a1bc6a7e50dddb2b375cb70b0/Scripts/run.py
 
-import sys, subprocess, time, threading, shlex
+import sys, os, io, codecs, subprocess, time, threading, shlex, selectors
 try:
     from Queue import Queue, Empty
 except:
     from queue import Queue, Empty
 
 ON_POSIX = 'posix' in sys.builtin_module_names
+CHUNK_SIZE = 65536
 
 class Run:
 
     def __init__(self):
         return
 
-    def _read_output(self, pipe, q):
+    def _read_output(self, pipe, name, q):
+        # Only used where pipes can't be registered with a selector (Windows)
         try:
-            for line in iter(lambda: pipe.read(1), b''):
-                q.put(line)
-        except ValueError:
+            for chunk in iter(lambda: os.read(pipe.fileno(), CHUNK_SIZE), b''):
+                q.put((name, chunk))
+        except (OSError, ValueError):
             pass
-        pipe.close()
+        q.put((name, b''))
 
-    def _create_thread(self, output):
-        # Creates a new queue and thread object to watch based on the output pipe sent
-        q = Queue()
-        t = threading.Thread(target=self._read_output, args=(output, q))
+    def _create_thread(self, output, name, q):
+        t = threading.Thread(target=self._read_output, args=(output, name, q))
         t.daemon = True
-        return (q,t)
+        return t
 
-    def _stream_output(self, comm, shell = False):
-        output = error = ""
+    def _read_chunks(self, p, deadline):
+        # Yields (name, chunk) as the child writes, an empty chunk means that pipe reached EOF
+        pipes = {"stdout": p.stdout, "stderr": p.stderr}
+        if ON_POSIX:
+            with selectors.DefaultSelector() as selector:
+                for name, pipe in pipes.items():
+                    os.set_blocking(pipe.fileno(), False)
+                    selector.register(pipe, selectors.EVENT_READ, name)
+                while selector.get_map():
+                    timeout = None if deadline is None else max(0, deadline - time.monotonic())
+                    events = selector.select(timeout)
+                    if not events:
+                        raise subprocess.TimeoutExpired(p.args, timeout)
+                    for key, mask in events:
+                        try:
+                            chunk = os.read(key.fd, CHUNK_SIZE)
+                        except BlockingIOError:
+                            continue
+                        if not chunk:
+                            selector.unregister(key.fileobj)
+                        yield (key.data, chunk)
+        else:
+            q = Queue()
+            threads = [self._create_thread(pipe, name, q) for name, pipe in pipes.items()]
+            for t in threads:
+                t.start()
+            open_pipes = len(threads)
+            while open_pipes:
+                timeout = None if deadline is None else max(0, deadline - time.monotonic())
+                try:
+                    name, chunk = q.get(timeout=timeout)
+                except Empty:
+                    raise subprocess.TimeoutExpired(p.args, timeout)
+                if not chunk:
+                    open_pipes -= 1
+                yield (name, chunk)
+
+    def _stream_output(self, comm, shell = False, timeout = None, line_callback = None):
+        # line_callback(line, name) is called for every complete line, name is "stdout" or "stderr"
         p = None
+        streams = {
+            "stdout": {"file": sys.stdout, "parts": [], "partial": "", "decoder": io.IncrementalNewlineDecoder(codecs.getincrementaldecoder("utf-8")("ignore"), True)},
+            "stderr": {"file": sys.stderr, "parts": [], "partial": "", "decoder": io.IncrementalNewlineDecoder(codecs.getincrementaldecoder("utf-8")("ignore"), True)}
+        }
+
+        def handle(name, chunk):
+            stream = streams[name]
+            text = stream["decoder"].decode(chunk, final=not chunk)
+            if not text:
+                return
+            stream["file"].write(text)
+            stream["file"].flush()
+            stream["parts"].append(text)
+            if line_callback:
+                lines = (stream["partial"] + text).split("\n")
+                stream["partial"] = lines.pop()
+                for line in lines:
+                    line_callback(line, name)
+
+        def result(returncode, error = ""):
+            for name, stream in streams.items():
+                if line_callback and stream["partial"]:
+                    line_callback(stream["partial"], name)
+                    stream["partial"] = ""
+            return ("".join(streams["stdout"]["parts"]), "".join(streams["stderr"]["parts"]) + error, returncode)
+
         try:
             if shell and type(comm) is list:
                 comm = " ".join(shlex.quote(x) for x in comm)
             if not shell and type(comm) is str:
                 comm = shlex.split(comm)
-            p = subprocess.Popen(comm, shell=shell, stdout=subprocess.PIPE, stderr=subprocess.PIPE, bufsize=0, universal_newlines=True, close_fds=ON_POSIX)
-            # Setup the stdout thread/queue
-            q,t   = self._create_thread(p.stdout)
-            qe,te = self._create_thread(p.stderr)
-            # Start both threads
-            t.start()
-            te.start()
-
-            while True:
-                c = z = ""
-                try: c = q.get_nowait()
-                except Empty: pass
-                else:
-                    sys.stdout.write(c)
-                    output += c
-                    sys.stdout.flush()
-                try: z = qe.get_nowait()
-                except Empty: pass
-                else:
-                    sys.stderr.write(z)
-                    error += z
-                    sys.stderr.flush()
-                if not c==z=="": continue # Keep going until empty
-                # No output - see if still running
-                p.poll()
-                if p.returncode != None:
-                    # Subprocess ended
-                    break
-                # No output, but subprocess still running - stall for 20ms
-                time.sleep(0.02)
-
-            o, e = p.communicate()
-            return (output+o, error+e, p.returncode)
+            p = subprocess.Popen(comm, shell=shell, stdout=subprocess.PIPE, stderr=subprocess.PIPE, bufsize=0, close_fds=ON_POSIX)
         except:
-            if p:
-                try: o, e = p.communicate()
-                except: o = e = ""
-                return (output+o, error+e, p.returncode)
             return ("", "Command not found!", 1)
 
+        deadline = None if timeout is None else time.monotonic() + timeout
+        try:
+            for name, chunk in self._read_chunks(p, deadline):
+                handle(name, chunk)
+            p.wait(None if deadline is None else max(0, deadline - time.monotonic()))
+            return result(p.returncode)
+        except subprocess.TimeoutExpired:
+            p.kill()
+            p.wait()
+            return result(p.returncode, "Command timed out after {} seconds!".format(timeout))
+        except:
+            p.kill()
+            p.wait()
+            return result(p.returncode)
+        finally:
+            p.stdout.close()
+            p.stderr.close()
+
     def _decode(self, value, encoding="utf-8", errors="ignore"):
         # Helper method to only decode if bytes type
         if sys.version_info >= (3,0) and isinstance(value, bytes):
             return value.decode(encoding,errors)
         return value
 
-    def _run_command(self, comm, shell = False):
+    def _run_command(self, comm, shell = False, timeout = None):
         c = None
         try:
             if shell and type(comm) is list:
@@ -90,7 +135,12 @@ class Run:
             if not shell and type(comm) is str:
                 comm = shlex.split(comm)
             p = subprocess.Popen(comm, shell=shell, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-            c = p.communicate()
+            try:
+                c = p.communicate(timeout=timeout)
+            except subprocess.TimeoutExpired:
+                p.kill()
+                o, e = p.communicate()
+                return (self._decode(o), self._decode(e) + "Command timed out after {} seconds!".format(timeout), p.returncode)
         except:
             if c == None:
                 return ("", "Command not found!", 1)
@@ -111,6 +161,8 @@ class Run:
             stderr = comm.get("stderr", False)
             mess   = comm.get("message", None)
             show   = comm.get("show",   False)
+            timeout = comm.get("timeout", None)
+            line_callback = comm.get("line_callback", None)
             
             if not mess == None:
                 print(mess)
@@ -133,10 +185,10 @@ class Run:
 
             if stream:
                 # Stream it!
-                out = self._stream_output(args, shell)
+                out = self._stream_output(args, shell, timeout, line_callback)
             else:
                 # Just run and gather output
-                out = self._run_command(args, shell)
+                out = self._run_command(args, shell, timeout)
                 if stdout and len(out[0]):
                     print(out[0])
                 if stderr and len(out[1]):
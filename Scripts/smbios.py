@@ -1,5 +1,6 @@
 from Scripts.datasets import cpu_data
 from Scripts.datasets.mac_model_data import mac_devices
+from Scripts.datasets import os_data
 from Scripts import gathering_files
 from Scripts import run
 from Scripts import utils
@@ -19,14 +20,9 @@ class SMBIOS:
         macserial_path = os.path.join(self.script_dir, macserial_name)
 
         if not os.path.exists(macserial_path):
-            download_history = self.utils.read_file(self.g.download_history_file)
-
-            if download_history:
-                product_index = self.g.get_product_index(download_history, "OpenCorePkg")
-                
-                if product_index:
-                    download_history.pop(product_index)
-                    self.utils.write_file(self.g.download_history_file, download_history)
+            download_history = self.g.load_download_history()
+            download_history.remove("OpenCorePkg")
+            download_history.flush()
 
             print("\n")
             print("{} not found. Please reopen the program to download it".format(macserial_name))
@@ -68,7 +64,7 @@ class SMBIOS:
 
         smbios_model = "MacBookPro16,3" if "Laptop" in platform else "iMacPro1,1"
 
-        if ("Sandy Bridge" in codename or "Ivy Bridge" in codename) and self.utils.parse_darwin_version(macos_version) < self.utils.parse_darwin_version("22.0.0"):
+        if ("Sandy Bridge" in codename or "Ivy Bridge" in codename) and os_data.DarwinVersion(macos_version) < os_data.DarwinVersion("22.0.0"):
             smbios_model = "MacPro6,1"
 
         if platform != "Laptop" and list(hardware_report.get("GPU").items())[-1][-1].get("Device Type") != "Integrated GPU":
@@ -113,7 +109,7 @@ class SMBIOS:
         elif "Cannon Lake" in codename or "Coffee Lake" in codename or "Comet Lake" in codename:
             smbios_model = "Macmini8,1"
             if "Desktop" in platform:
-                smbios_model = "iMac18,3" if self.utils.parse_darwin_version(macos_version) < self.utils.parse_darwin_version("18.0.0") else "iMac19,1"
+                smbios_model = "iMac18,3" if os_data.DarwinVersion(macos_version) < os_data.DarwinVersion("18.0.0") else "iMac19,1"
                 if "Comet Lake" in codename:
                     smbios_model = "iMac20,1" if int(hardware_report.get("CPU").get("Core Count")) < 10 else "iMac20,2"
             elif "Laptop" in platform:
@@ -149,7 +145,7 @@ class SMBIOS:
                 line = "{} {:2}. {:15} - {:10} {:20}{}".format(checkbox, index, device.name, device.cpu, "({})".format(device.cpu_generation), "" if not device.discrete_gpu else " - {}".format(device.discrete_gpu))
                 if device.name == selected_smbios_model:
                     line = "\033[1;32m{}\033[0m".format(line)
-                elif not self.utils.parse_darwin_version(device.initial_support) <= self.utils.parse_darwin_version(macos_version) <= self.utils.parse_darwin_version(device.last_supported_version):
+                elif not os_data.DarwinVersion(macos_version).is_between(device.initial_support, device.last_supported_version):
                     line = "\033[90m{}\033[0m".format(line)
                 contents.append(line)
             contents.append("\033[1;36m")
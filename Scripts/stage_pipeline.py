@@ -0,0 +1,128 @@
+import threading
+import queue
+import time
+
+class PipelineStage:
+    def __init__(self, name, function, workers=1):
+        self.name = name
+        self.function = function
+        self.workers = workers
+        self.busy_time = 0.0
+        self.blocked_time = 0.0
+        self.items = 0
+        self.finished_workers = 0
+        self.lock = threading.Lock()
+
+    def record(self, busy_time=0.0, blocked_time=0.0, items=0):
+        with self.lock:
+            self.busy_time += busy_time
+            self.blocked_time += blocked_time
+            self.items += items
+
+class StagePipeline:
+    def __init__(self, queue_size=4, poll_interval=0.1):
+        self.queue_size = queue_size
+        self.poll_interval = poll_interval
+        self.source_stage = None
+        self.stages = []
+        self.done = object()
+
+    def add_stage(self, name, function, workers=1):
+        self.stages.append(PipelineStage(name, function, workers))
+
+    def get_timings(self):
+        return [(stage.name, stage.items, stage.busy_time, stage.blocked_time) for stage in [self.source_stage] + self.stages if stage]
+
+    def put(self, stage_queue, item, stage, stop_event):
+        started = time.perf_counter()
+        # A full queue holds the producer back until the next stage catches up
+        while not stop_event.is_set():
+            try:
+                stage_queue.put(item, timeout=self.poll_interval)
+                break
+            except queue.Full:
+                continue
+        stage.record(blocked_time=time.perf_counter() - started)
+
+    def feed(self, source, queues, errors, stop_event):
+        iterator = iter(source)
+        try:
+            while not stop_event.is_set():
+                started = time.perf_counter()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    break
+                self.source_stage.record(busy_time=time.perf_counter() - started, items=1)
+                self.put(queues[0], item, self.source_stage, stop_event)
+        except Exception as e:
+            errors.append(e)
+            stop_event.set()
+        finally:
+            if hasattr(iterator, "close"):
+                iterator.close()
+            for _ in range(self.stages[0].workers):
+                self.put(queues[0], self.done, self.source_stage, stop_event)
+
+    def work(self, index, queues, errors, stop_event):
+        stage = self.stages[index]
+        next_stage = self.stages[index + 1] if index + 1 < len(self.stages) else None
+
+        while True:
+            try:
+                item = queues[index].get(timeout=self.poll_interval)
+            except queue.Empty:
+                if stop_event.is_set():
+                    return
+                continue
+
+            if item is self.done:
+                break
+
+            # Once any stage has failed, items still queued are dropped instead of processed
+            if stop_event.is_set():
+                return
+
+            started = time.perf_counter()
+            try:
+                result = stage.function(item)
+            except Exception as e:
+                errors.append(e)
+                stop_event.set()
+                return
+            stage.record(busy_time=time.perf_counter() - started, items=1)
+
+            if next_stage and result is not None:
+                self.put(queues[index + 1], result, stage, stop_event)
+
+        with stage.lock:
+            stage.finished_workers += 1
+            last_worker = stage.finished_workers == stage.workers
+
+        # The last worker of a stage tells every worker of the next stage that no more items are coming
+        if next_stage and last_worker:
+            for _ in range(next_stage.workers):
+                self.put(queues[index + 1], self.done, stage, stop_event)
+
+    def run(self, source, source_name="source"):
+        self.source_stage = PipelineStage(source_name, None)
+        queues = [queue.Queue(maxsize=self.queue_size) for stage in self.stages]
+        errors = []
+        stop_event = threading.Event()
+
+        threads = [threading.Thread(target=self.feed, args=(source, queues, errors, stop_event))]
+        for index, stage in enumerate(self.stages):
+            for _ in range(stage.workers):
+                threads.append(threading.Thread(target=self.work, args=(index, queues, errors, stop_event)))
+
+        try:
+            for thread in threads:
+                thread.daemon = True
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            stop_event.set()
+
+        if errors:
+            raise errors[0]
@@ -0,0 +1,58 @@
+from collections import deque
+
+class SubstringMatcher:
+    def __init__(self, items):
+        # Aho-Corasick automaton over the case-folded items, each node remembers the lowest item index ending there
+        self.items = list(items)
+        self.transitions = [{}]
+        self.fail_links = [0]
+        self.outputs = [None]
+
+        for index, item in enumerate(self.items):
+            node = 0
+            for char in item.casefold():
+                next_node = self.transitions[node].get(char)
+                if next_node is None:
+                    next_node = len(self.transitions)
+                    self.transitions.append({})
+                    self.fail_links.append(0)
+                    self.outputs.append(None)
+                    self.transitions[node][char] = next_node
+                node = next_node
+            self.outputs[node] = self.get_first_index(self.outputs[node], index)
+
+        pending_nodes = deque(self.transitions[0].values())
+        while pending_nodes:
+            node = pending_nodes.popleft()
+            for char, child in self.transitions[node].items():
+                pending_nodes.append(child)
+
+                fail_link = self.fail_links[node]
+                while fail_link and char not in self.transitions[fail_link]:
+                    fail_link = self.fail_links[fail_link]
+                fail_link = self.transitions[fail_link].get(char, 0)
+
+                self.fail_links[child] = fail_link if fail_link != child else 0
+                self.outputs[child] = self.get_first_index(self.outputs[child], self.outputs[self.fail_links[child]])
+
+    def get_first_index(self, index, other_index):
+        if index is None:
+            return other_index
+        if other_index is None:
+            return index
+        return min(index, other_index)
+
+    def find(self, text):
+        # Same result as Utils.contains_any, the first item in list order that occurs in text
+        node = 0
+        first_index = self.outputs[0]
+
+        for char in text.casefold():
+            while node and char not in self.transitions[node]:
+                node = self.fail_links[node]
+            node = self.transitions[node].get(char, 0)
+            first_index = self.get_first_index(first_index, self.outputs[node])
+            if first_index == 0:
+                break
+
+        return None if first_index is None else self.items[first_index]
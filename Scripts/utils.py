@@ -40,8 +40,9 @@ class Utils:
                 data = file_handle.read()
             return data
 
-    def find_matching_paths(self, root_path, extension_filter=None, name_filter=None, type_filter=None):
-
+    def iterate_matching_paths(self, root_path, extension_filter=None, name_filter=None, type_filter=None, prune=None):
+        # Yields (relative_path, type) lazily, each directory is listed before any of its subdirectories.
+        # prune receives the relative path of a directory and returns True to skip everything below it
         def is_valid_item(name):
             if name.startswith("."):
                 return False
@@ -50,21 +51,42 @@ class Utils:
             if name_filter and name_filter not in name:
                 return False
             return True
-        
-        found_paths = []
 
-        for root, dirs, files in os.walk(root_path):
-            relative_root = root.replace(root_path, "")[1:]
+        pending_dirs = [""]
+
+        while pending_dirs:
+            relative_root = pending_dirs.pop()
+            subdirs = []
+
+            try:
+                entries = os.scandir(os.path.join(root_path, relative_root))
+            except OSError:
+                continue
+
+            with entries:
+                for entry in entries:
+                    relative_path = os.path.join(relative_root, entry.name)
 
-            if type_filter in (None, "dir"):
-                for d in dirs:
-                    if is_valid_item(d):
-                        found_paths.append((os.path.join(relative_root, d), "dir"))
+                    try:
+                        is_dir = entry.is_dir()
+                    except OSError:
+                        is_dir = False
 
-            if type_filter in (None, "file"):
-                for file in files:
-                    if is_valid_item(file):
-                        found_paths.append((os.path.join(relative_root, file), "file"))
+                    if is_dir:
+                        if type_filter in (None, "dir") and is_valid_item(entry.name):
+                            yield relative_path, "dir"
+                        if not entry.is_symlink() and not (prune and prune(relative_path)):
+                            subdirs.append(relative_path)
+                    elif type_filter in (None, "file") and is_valid_item(entry.name):
+                        yield relative_path, "file"
+
+            pending_dirs.extend(reversed(subdirs))
+
+    def find_matching_paths(self, root_path, extension_filter=None, name_filter=None, type_filter=None, prune=None, sort=True):
+        found_paths = self.iterate_matching_paths(root_path, extension_filter, name_filter, type_filter, prune)
+
+        if not sort:
+            return list(found_paths)
 
         return sorted(found_paths, key=lambda path: path[0])
 
@@ -105,14 +127,21 @@ class Utils:
     def string_to_hex(self, string):
         return ''.join(format(ord(char), '02X') for char in string)
     
-    def extract_zip_file(self, zip_path, extraction_directory=None):
+    def extract_zip_file(self, zip_path, extraction_directory=None, member_filter=None):
         if extraction_directory is None:
             extraction_directory = os.path.splitext(zip_path)[0]
         
         os.makedirs(extraction_directory, exist_ok=True)
         
         with zipfile.ZipFile(zip_path, 'r') as zip_ref:
-            zip_ref.extractall(extraction_directory)
+            if member_filter is None:
+                zip_ref.extractall(extraction_directory)
+                return
+
+            # Only write the members the caller is going to keep
+            for member in zip_ref.infolist():
+                if member_filter(member.filename):
+                    zip_ref.extract(member, extraction_directory)
 
     def contains_any(self, data, search_item, start=0, end=None):
         return next((item for item in data[start:end] if item.lower() in search_item.lower()), None)
@@ -143,10 +172,6 @@ class Utils:
         # Convert the path to an absolute path and normalize it according to the OS
         return str(pathlib.Path(path).resolve())
     
-    def parse_darwin_version(self, darwin_version):
-        major, minor, patch = map(int, darwin_version.split('.'))
-        return major, minor, patch
-    
     def open_folder(self, folder_path):
         if os.name == 'posix':
             if 'darwin' in os.uname().sysname.lower():
@@ -0,0 +1,29 @@
+import os
+import shutil
+
+# Only the standard library is used here, the launcher applies the update before anything from Scripts is imported
+def apply_staged_update(root_dir):
+    staging_dir = os.path.join(root_dir, ".update_staging")
+    staged_sha_version = os.path.join(staging_dir, "sha_version.txt")
+    files_dir = os.path.join(staging_dir, "files")
+    updated_paths = []
+
+    # sha_version.txt is written last when staging, without it the staged files are incomplete
+    if not os.path.isfile(staged_sha_version):
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        return updated_paths
+
+    for root, dirs, files in os.walk(files_dir):
+        for name in files:
+            source = os.path.join(root, name)
+            path = os.path.relpath(source, files_dir)
+            destination = os.path.join(root_dir, path)
+            os.makedirs(os.path.dirname(destination), exist_ok=True)
+            shutil.move(source, destination)
+            if ".command" in os.path.splitext(path)[-1] and os.name != "nt":
+                os.chmod(destination, os.stat(destination).st_mode | 0o111)
+            updated_paths.append(path.replace(os.sep, "/"))
+
+    shutil.copyfile(staged_sha_version, os.path.join(root_dir, "sha_version.txt"))
+    shutil.rmtree(staging_dir, ignore_errors=True)
+    return updated_paths
@@ -0,0 +1,82 @@
+from Scripts import github
+import http.server
+import io
+import json
+import threading
+import unittest
+from contextlib import redirect_stdout
+
+class GraphQLHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    requests = []
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length"))))
+        self.requests.append((self.path, self.headers.get("Authorization"), payload.get("query")))
+
+        body = json.dumps({
+            "data": {
+                "r0": {"releases": {"nodes": [{
+                    "description": "Lilu release",
+                    "releaseAssets": {"nodes": [
+                        {"databaseId": 1, "name": "Lilu-1.6.8-RELEASE.zip", "downloadUrl": "https://example.com/Lilu-1.6.8-RELEASE.zip"},
+                        {"databaseId": 2, "name": "Lilu-1.6.8-DEBUG.zip", "downloadUrl": "https://example.com/Lilu-1.6.8-DEBUG.zip"}
+                    ]}
+                }]}},
+                "r1": {"releases": {"nodes": []}}
+            }
+        }).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+class LatestReleasesTest(unittest.TestCase):
+    def setUp(self):
+        GraphQLHandler.requests = []
+        self.server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), GraphQLHandler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        github.rate_limit.update({"remaining": None, "reset": None})
+        github.notices["graphql_fallback"] = False
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_graphql_batch_with_token(self):
+        client = github.Github()
+        client.headers["Authorization"] = "token test-token"
+        client.graphql_url = "http://127.0.0.1:{}/graphql".format(self.server.server_address[1])
+        client.get_latest_release = lambda owner, repo: self.fail("REST fallback used with a token set")
+
+        latest_releases = client.get_latest_releases([("acidanthera", "Lilu"), ("acidanthera", "Empty"), ("acidanthera", "Lilu")])
+
+        self.assertEqual(len(GraphQLHandler.requests), 1)
+        path, authorization, query = GraphQLHandler.requests[0]
+        self.assertEqual(path, "/graphql")
+        self.assertEqual(authorization, "token test-token")
+        self.assertIn("r1: repository", query)
+        self.assertIsNone(latest_releases[("acidanthera", "Empty")])
+        self.assertEqual(latest_releases[("acidanthera", "Lilu")]["describe"], "Lilu release")
+        self.assertEqual([asset["id"] for asset in latest_releases[("acidanthera", "Lilu")]["assets"]], [1])
+
+    def test_rest_fallback_without_token_is_announced_once(self):
+        client = github.Github()
+        client.get_latest_release = lambda owner, repo: {"describe": repo, "assets": []}
+
+        output = io.StringIO()
+        with redirect_stdout(output):
+            client.get_latest_releases([("acidanthera", "Lilu")])
+            latest_releases = client.get_latest_releases([("acidanthera", "WhateverGreen")])
+
+        self.assertEqual(GraphQLHandler.requests, [])
+        self.assertEqual(output.getvalue().count("No GitHub token is set"), 1)
+        self.assertEqual(latest_releases[("acidanthera", "WhateverGreen")]["describe"], "WhateverGreen")
+
+if __name__ == "__main__":
+    unittest.main()
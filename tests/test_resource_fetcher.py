@@ -0,0 +1,55 @@
+from Scripts import resource_fetcher
+import http.server
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+FILE_CONTENT = os.urandom(3 * 1024 * 1024)
+
+class MirrorHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        if self.path == "/missing.zip":
+            body = b"Not Found"
+            self.send_response(404)
+        else:
+            body = FILE_CONTENT
+            self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        for index in range(0, len(body), 64 * 1024):
+            self.wfile.write(body[index:index + 64 * 1024])
+
+class OpenWithMirrorsTest(unittest.TestCase):
+    def setUp(self):
+        self.server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), MirrorHandler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.base_url = "http://127.0.0.1:{}".format(self.server.server_address[1])
+        self.temporary_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.temporary_dir, ignore_errors=True)
+
+    def test_failed_primary_does_not_abort_mirror_on_same_host(self):
+        # The failed primary's connection must not be aborted once the mirror on the same host has taken it over
+        fetcher = resource_fetcher.ResourceFetcher()
+        fetcher.session = resource_fetcher.PooledSession()
+        destination_path = os.path.join(self.temporary_dir, "file.zip")
+
+        for _ in range(3):
+            fetcher.download_and_save_file(self.base_url + "/missing.zip", destination_path, show_progress=False, mirror_urls=[self.base_url + "/file.zip"])
+
+            with open(destination_path, "rb") as file_reader:
+                self.assertEqual(file_reader.read(), FILE_CONTENT)
+
+if __name__ == "__main__":
+    unittest.main()
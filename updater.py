@@ -1,10 +1,14 @@
+from Scripts import download_scheduler
 from Scripts import resource_fetcher
 from Scripts import github
-from Scripts import run
 from Scripts import utils
 import os
 import tempfile
 import shutil
+import threading
+import hashlib
+import time
+from urllib.error import HTTPError
 
 class Updater:
     def __init__(self):
@@ -13,77 +17,205 @@ class Updater:
             "Accept": "application/vnd.github+json",
             "X-GitHub-Api-Version": "2022-11-28",
         })
-        self.run = run.Run().run
+        self.file_downloader = download_scheduler.DownloadScheduler(resource_fetcher.ResourceFetcher())
         self.utils = utils.Utils()
-        self.sha_version = os.path.join(os.path.dirname(os.path.realpath(__file__)), "sha_version.txt")
+        self.root_dir = os.path.dirname(os.path.realpath(__file__))
+        self.sha_version = os.path.join(self.root_dir, "sha_version.txt")
+        self.repo_owner = "lzhoang2801"
+        self.repo_name = "OpCore-Simplify"
         self.download_repo_url = "https://github.com/lzhoang2801/OpCore-Simplify/archive/refs/heads/main.zip"
         self.temporary_dir = tempfile.mkdtemp()
+        self.staging_dir = os.path.join(self.root_dir, ".update_staging")
+        self.staged_sha_version = os.path.join(self.staging_dir, "sha_version.txt")
+        self.check_deadline = 60
+        self.check_started = None
+        self.check_thread = None
+        self.update_status = None
+        self.latest_commit_sha = None
 
-    def get_current_sha_version(self):
+    def get_current_sha_version(self, show_warning=True):
         current_sha_version = self.utils.read_file(self.sha_version)
 
         if not current_sha_version:
-            print("SHA version information is missing in the sha_version.txt file.\n")
+            if show_warning:
+                print("SHA version information is missing in the sha_version.txt file.\n")
             return "0506fb67111d5c5230bf59b826c318ea4251dfc4"
 
         return current_sha_version.decode()
 
     def get_latest_sha_version(self):
-        latest_commit = self.github.get_latest_commit("lzhoang2801", "OpCore-Simplify") or {}
+        latest_commit = self.github.get_latest_commit(self.repo_owner, self.repo_name)
 
-        return latest_commit.get("sha") or "0506fb67111d5c5230bf59b826c318ea4251dfc4"
+        if not latest_commit and not self.github.check_ratelimit():
+            return None
 
-    def download_update(self):
+        # The tree sha identifies the version, the commit sha is needed to fetch its files
+        self.latest_commit_sha = (latest_commit or {}).get("commit_sha")
+
+        return (latest_commit or {}).get("sha") or "0506fb67111d5c5230bf59b826c318ea4251dfc4"
+
+    def download_update(self, show_progress=True):
         self.utils.create_folder(self.temporary_dir)
         file_path = os.path.join(self.temporary_dir, os.path.basename(self.download_repo_url))
-        self.fetcher.download_and_save_file(self.download_repo_url, file_path)
+        self.fetcher.download_and_save_file(self.download_repo_url, file_path, show_progress=show_progress)
         self.utils.extract_zip_file(file_path)
 
-    def update_files(self):
-        target_dir = os.path.join(self.temporary_dir, "main", "OpCore-Simplify-main")
-        file_paths = self.utils.find_matching_paths(target_dir, type_filter="file")
+    def get_staged_sha_version(self):
+        staged_sha_version = self.utils.read_file(self.staged_sha_version)
+
+        return staged_sha_version.decode() if staged_sha_version else None
+
+    def get_blob_sha(self, file_path, normalize_line_endings=False):
+        with open(file_path, "rb") as file_reader:
+            content = file_reader.read()
+
+        if normalize_line_endings:
+            content = content.replace(b"\r\n", b"\n")
+
+        return hashlib.sha1(b"blob " + str(len(content)).encode() + b"\0" + content).hexdigest()
+
+    def is_local_file_current(self, local_path, blob_sha):
+        # Git stores text files with LF line endings, so a CRLF checkout is hashed both ways
+        return self.get_blob_sha(local_path) == blob_sha or self.get_blob_sha(local_path, normalize_line_endings=True) == blob_sha
+
+    def download_changed_files(self, tree_sha, commit_sha, files_dir):
+        if not commit_sha:
+            return False
+
+        tree = self.github.get_tree(self.repo_owner, self.repo_name, tree_sha)
+
+        if tree is None:
+            return False
+
+        download_jobs = []
+
+        for entry in tree:
+            local_path = os.path.join(self.root_dir, entry.get("path"))
+            if os.path.isfile(local_path) and self.is_local_file_current(local_path, entry.get("sha")):
+                continue
 
-        for path, type in file_paths:
-            source = os.path.join(target_dir, path)
-            destination = source.replace(target_dir, os.path.dirname(os.path.realpath(__file__)))
-            self.utils.create_folder(os.path.dirname(destination))
-            shutil.move(source, destination)
-            if ".command" in os.path.splitext(path)[-1] and os.name != "nt":
-                self.run({
-                    "args":["chmod", "+x", destination]
-                })
-        shutil.rmtree(self.temporary_dir)
+            destination_path = os.path.join(files_dir, entry.get("path"))
+            self.utils.create_folder(os.path.dirname(destination_path))
+            download_jobs.append((entry.get("sha"), self.github.get_raw_url(self.repo_owner, self.repo_name, commit_sha, entry.get("path")), destination_path, None, []))
+
+        self.utils.create_folder(files_dir)
+
+        downloaded_files = self.file_downloader.download_all(download_jobs)
+        try:
+            for blob_sha, destination_path, sha256 in downloaded_files:
+                # raw.githubusercontent.com serves the exact blob, so no line ending variant is accepted here
+                if self.get_blob_sha(destination_path) != blob_sha:
+                    raise ValueError("Downloaded file {} does not match blob {}".format(destination_path, blob_sha))
+        except (HTTPError, ValueError):
+            # Nothing partial is staged, the full archive is downloaded instead
+            downloaded_files.cancel()
+            shutil.rmtree(files_dir, ignore_errors=True)
+            return False
+
+        return True
+
+    def stage_update(self, latest_sha_version):
+        staging_temporary_dir = self.staging_dir + ".tmp"
+        files_dir = os.path.join(staging_temporary_dir, "files")
+        shutil.rmtree(staging_temporary_dir, ignore_errors=True)
+
+        # Only the files whose blob differs from the local copy are fetched, the full archive is the fallback
+        if not self.download_changed_files(latest_sha_version, self.latest_commit_sha, files_dir):
+            self.download_update(show_progress=False)
+            shutil.rmtree(files_dir, ignore_errors=True)
+            shutil.move(os.path.join(self.temporary_dir, "main", "OpCore-Simplify-main"), files_dir)
+            shutil.rmtree(self.temporary_dir, ignore_errors=True)
+
+        # Deadline passed while downloading, leave the current version alone
+        if self.is_check_expired():
+            shutil.rmtree(staging_temporary_dir, ignore_errors=True)
+            return False
 
-    def save_latest_sha_version(self, latest_sha):
-        self.utils.write_file(self.sha_version, latest_sha.encode())
+        self.utils.write_file(os.path.join(staging_temporary_dir, "sha_version.txt"), latest_sha_version.encode())
+        shutil.rmtree(self.staging_dir, ignore_errors=True)
+        # The staged update becomes visible with a single rename
+        os.replace(staging_temporary_dir, self.staging_dir)
+        return True
+
+    def is_check_expired(self):
+        return self.check_started is not None and time.time() - self.check_started > self.check_deadline
+
+    def check_for_updates(self):
+        try:
+            current_sha_version = self.get_current_sha_version(show_warning=False)
+            latest_sha_version = self.get_latest_sha_version()
+
+            if not latest_sha_version:
+                self.update_status = "Update check unavailable (GitHub API quota exhausted)"
+            elif latest_sha_version in (current_sha_version, self.get_staged_sha_version()):
+                self.update_status = "Up to date" if latest_sha_version == current_sha_version else "Update {} staged, it will be applied on the next launch".format(latest_sha_version[:7])
+            elif self.stage_update(latest_sha_version):
+                self.update_status = "Update {} staged, it will be applied on the next launch".format(latest_sha_version[:7])
+        except Exception as e:
+            self.update_status = "Update check failed: {}".format(e)
+
+    def start_background_check(self):
+        self.check_started = time.time()
+        self.check_thread = threading.Thread(target=self.check_for_updates)
+        self.check_thread.daemon = True
+        self.check_thread.start()
+
+    def get_update_status(self):
+        if self.check_thread is None:
+            return self.update_status
+
+        if self.check_thread.is_alive():
+            return "Update check timed out" if self.is_check_expired() else "Checking for updates..."
+
+        return self.update_status
 
     def run_update(self):
         self.utils.head("Check for Updates")
         print("")
+
+        # Both checks stage into the same directory, so only one may run at a time
+        if self.check_thread is not None and self.check_thread.is_alive():
+            print("An update check is already running in the background, please try again shortly.")
+            print("")
+            self.utils.request_input()
+            return False
+
         current_sha_version = self.get_current_sha_version()
+        latest_sha_version = self.get_latest_sha_version()
 
-        if not self.github.check_ratelimit():
+        if not latest_sha_version:
             print("GitHub REST API request quota has been exhausted. Automatic update check is unavailable now.")
             print("Please check for updates manually if needed.")
             print("")
             self.utils.request_input()
             return False
 
-        latest_sha_version = self.get_latest_sha_version()
         print("Current script SHA version: {}".format(current_sha_version))
         print("Latest script SHA version: {}".format(latest_sha_version))
         print("")
-        if latest_sha_version != current_sha_version:
-            print("Updating from version {} to {}".format(current_sha_version, latest_sha_version))
+        if latest_sha_version == current_sha_version:
+            print("You are already using the latest version")
             print("")
-            self.download_update()
-            self.update_files()
-            self.save_latest_sha_version(latest_sha_version)
-            print("\n")
-            print("The program needs to restart to complete the update process.")
-            print("\n")
             self.utils.request_input()
-        else:
-            print("You are already using the latest version")
-        
-        return latest_sha_version != current_sha_version
\ No newline at end of file
+            return False
+
+        if latest_sha_version != self.get_staged_sha_version():
+            print("Downloading version {}...".format(latest_sha_version))
+            # A check the user asked for is not bound by the background deadline
+            self.check_started = None
+            try:
+                staged = self.stage_update(latest_sha_version)
+            except Exception as e:
+                staged = False
+                print("Update failed: {}".format(e))
+            if not staged:
+                print("")
+                self.utils.request_input()
+                return False
+
+        self.update_status = "Update {} staged, it will be applied on the next launch".format(latest_sha_version[:7])
+        print("")
+        print("The update will be applied the next time the program starts.")
+        print("")
+        self.utils.request_input()
+        return True